@@ -5,3 +5,36 @@ import statistics as stats
 connector = table.InputConnect(dataSet)
 date = '2022-05-31T17:32:31+0300'
 cProfile.runctx('connector.make_date_format_util_parser(date)', None, locals())'''
+
+import re
+import timeit
+import csv_reader as reader
+
+def benchmark_clear_str(file_name='hh_vacancies.csv', number=20):
+    """Сравнивает очистку строк файла прежним способом (некомпилированное регулярное
+    выражение для каждого поля) и текущим (пропуск числовых полей и дат,
+    быстрый путь для строк без '<')
+
+        Args:
+            file_name (str): название csv-файла в формате выгрузки hh.ru
+            number (int): количество повторов
+        Returns:
+            tuple: (время прежнего способа, время текущего способа) в секундах
+    """
+    titles = reader.read_titles(file_name)
+    rows = list(reader.iter_rows(file_name))
+    indexes = reader.get_cleaned_indexes(titles)
+
+    def clear_old():
+        for row in rows:
+            [' '.join(re.sub(r"\<[^>]*\>", '', field).split()) for field in row]
+
+    def clear_new():
+        for row in rows:
+            [reader.clear_str(row[i]) for i in indexes]
+
+    return timeit.timeit(clear_old, number=number), timeit.timeit(clear_new, number=number)
+
+if __name__ == '__main__':
+    old_time, new_time = benchmark_clear_str()
+    print(f"clear_str: {old_time:.4f} с -> {new_time:.4f} с ({old_time / new_time:.1f}x)")
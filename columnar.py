@@ -0,0 +1,185 @@
+import os
+from array import array
+import numpy as np
+import pandas as pd
+import statistics as stats
+import csv_reader as reader
+from currency import get_month_ordinal
+
+PARTITION_COLUMNS = ('salary_from', 'salary_to', 'currency_codes', 'currencies', 'months',
+                     'area_codes', 'areas', 'name_codes', 'names')
+
+def encode_cleaned(codes, values):
+    """Перекодирует номера категорий после очистки их названий от html-тегов:
+    совпавшие после очистки названия объединяются, а номера назначаются
+    в порядке первого появления
+
+        Args:
+            codes (numpy.ndarray): номера исходных названий в списке values
+            values (list): исходные названия
+        Returns:
+            tuple: (новые номера категорий, список очищенных названий)
+    """
+    cleaned_codes, cleaned = pd.factorize(np.array([reader.clear_str(value) for value in values], dtype=object))
+    codes, uniques = pd.factorize(cleaned_codes[codes])
+    return codes, cleaned[uniques].tolist()
+
+class ColumnarDataSet:
+    """Класс для представления набора вакансий в виде столбцов numpy
+
+        Attributes:
+            salary (numpy.ndarray): зарплаты в рублях (float64)
+            year (numpy.ndarray): годы публикации (int16)
+            area_codes (numpy.ndarray): коды городов
+            areas (list or pandas.Index): названия городов в порядке первого появления
+            name_codes (numpy.ndarray): коды названий профессий
+            names (list or pandas.Index): названия профессий в порядке первого появления
+    """
+    def __init__(self, salary, year, area_codes, areas, name_codes, names):
+        """Инициализирует объект ColumnarDataSet
+
+            Args:
+                salary (numpy.ndarray): зарплаты в рублях
+                year (numpy.ndarray): годы публикации
+                area_codes (numpy.ndarray): коды городов
+                areas (list or pandas.Index): названия городов
+                name_codes (numpy.ndarray): коды названий профессий
+                names (list or pandas.Index): названия профессий
+        """
+        self.salary = np.asarray(salary, dtype=np.float64)
+        self.year = np.asarray(year, dtype=np.int16)
+        self.area_codes = np.asarray(area_codes)
+        self.areas = areas
+        self.name_codes = np.asarray(name_codes)
+        self.names = names
+
+    @classmethod
+    def from_values(cls, salary, year, area, name):
+        """Создает набор столбцов из значений, кодируя города и названия профессий
+
+            Args:
+                salary (list or numpy.ndarray): зарплаты в рублях
+                year (list or numpy.ndarray): годы публикации
+                area (list or numpy.ndarray): места работы
+                name (list or numpy.ndarray): названия профессий
+            Returns:
+                ColumnarDataSet: набор вакансий в виде столбцов
+        """
+        area_codes, areas = pd.factorize(np.asarray(area, dtype=object), sort=False)
+        name_codes, names = pd.factorize(np.asarray(name, dtype=object), sort=False)
+        return cls(salary, year, area_codes, areas, name_codes, names)
+
+    @classmethod
+    def from_partition(cls, folder, rates):
+        """Создает набор столбцов из двоичной партиции, записанной
+        csv_parts_creator.save_columnar_partition. Столбцы отображаются в память
+
+            Args:
+                folder (str): папка с файлами столбцов .npy
+                rates (CurrencyRates): курсы валют по месяцам
+            Returns:
+                ColumnarDataSet: набор вакансий в виде столбцов
+        """
+        columns = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode='r')
+                   for name in PARTITION_COLUMNS}
+        salary = rates.convert_codes(columns['salary_from'], columns['salary_to'],
+                                     columns['currency_codes'], columns['currencies'], columns['months'])
+        mask = ~np.isnan(salary)
+        return cls(salary[mask], columns['months'][mask] // 12,
+                   columns['area_codes'][mask], columns['areas'].tolist(),
+                   columns['name_codes'][mask], columns['names'].tolist())
+
+    @classmethod
+    def from_vacancies(cls, vacancies):
+        """Создает набор столбцов из списка объектов Vacancy
+
+            Args:
+                vacancies (list): список вакансий
+            Returns:
+                ColumnarDataSet: набор вакансий в виде столбцов
+        """
+        return cls.from_values([float(vac.salary) for vac in vacancies],
+                               [vac.published_at for vac in vacancies],
+                               [vac.area_name for vac in vacancies],
+                               [vac.name for vac in vacancies])
+
+    @classmethod
+    def from_rows(cls, rows, titles, rates):
+        """Создает набор столбцов из строк csv-файла за один проход: числа сразу
+        записываются в типизированные массивы, а названия профессий, города и валюты -
+        номерами категорий, поэтому строки файла целиком в памяти не хранятся.
+        Разбор самих строк csv остается построчным; каждое уникальное название
+        очищается от html-тегов один раз. Оклады переводятся в рубли одним вызовом
+        CurrencyRates.convert_codes, вакансии без оклада в рублях отбрасываются
+
+            Args:
+                rows (iterable): строки, считанные из файла
+                titles (list): заголовки столбцов
+                rates (CurrencyRates): курсы валют по месяцам
+            Returns:
+                ColumnarDataSet: набор вакансий в виде столбцов
+        """
+        indexes = [titles.index(title) for title in
+                   ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at')]
+        salary_from, salary_to = array('d'), array('d')
+        name_codes, currency_codes, area_codes, months = array('q'), array('q'), array('q'), array('q')
+        names, currencies, areas = {}, {}, {}
+        for row in rows:
+            name, value_from, value_to, currency, area, published_at = [row[i] for i in indexes]
+            salary_from.append(float(value_from) if value_from != '' else np.nan)
+            salary_to.append(float(value_to) if value_to != '' else np.nan)
+            name_codes.append(names.setdefault(name, len(names)))
+            currency_codes.append(currencies.setdefault(currency, len(currencies)))
+            area_codes.append(areas.setdefault(area, len(areas)))
+            months.append(get_month_ordinal(published_at))
+
+        months = np.frombuffer(months, dtype=np.int64)
+        salary = rates.convert_codes(np.frombuffer(salary_from), np.frombuffer(salary_to),
+                                     np.frombuffer(currency_codes, dtype=np.int64), list(currencies), months)
+        mask = ~np.isnan(salary)
+        area_codes, area_names = encode_cleaned(np.frombuffer(area_codes, dtype=np.int64)[mask], list(areas))
+        name_codes, name_names = encode_cleaned(np.frombuffer(name_codes, dtype=np.int64)[mask], list(names))
+        return cls(salary[mask], months[mask] // 12, area_codes, area_names, name_codes, name_names)
+
+    def get_job_mask(self, job):
+        """Получает маску вакансий, в названии которых есть заданная профессия.
+        Проверка выполняется один раз для каждого уникального названия
+
+            Args:
+                job (str): название профессии
+            Returns:
+                numpy.ndarray: булев массив
+        """
+        names_mask = np.fromiter((job in name for name in self.names), dtype=bool, count=len(self.names))
+        return names_mask[self.name_codes]
+
+    def aggregate(self, job):
+        """Вычисляет статистику по годам и городам с помощью векторных группировок
+
+            Args:
+                job (str): название профессии, по которой нужно получить статистику
+            Returns:
+                statistics.StatisticsAccumulator: накопленная статистика
+        """
+        accumulator = stats.StatisticsAccumulator(job)
+        if len(self.salary) == 0:
+            return accumulator
+
+        ages, year_codes = np.unique(self.year, return_inverse=True)
+        job_mask = self.get_job_mask(job)
+        size = len(ages)
+        number_all = np.bincount(year_codes, minlength=size)
+        salary_all = np.bincount(year_codes, weights=self.salary, minlength=size)
+        number_job = np.bincount(year_codes[job_mask], minlength=size)
+        salary_job = np.bincount(year_codes[job_mask], weights=self.salary[job_mask], minlength=size)
+        for i, age in enumerate(ages.tolist()):
+            accumulator.years[age] = [int(number_all[i]), float(salary_all[i]),
+                                      int(number_job[i]), float(salary_job[i])]
+
+        size = len(self.areas)
+        number_cities = np.bincount(self.area_codes, minlength=size)
+        salary_cities = np.bincount(self.area_codes, weights=self.salary, minlength=size)
+        for i, city in enumerate(self.areas):
+            if number_cities[i] > 0:
+                accumulator.cities[city] = [int(number_cities[i]), float(salary_cities[i])]
+        return accumulator
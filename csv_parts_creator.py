@@ -1,4 +1,12 @@
+import os
 import csv
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+import csv_reader as reader
+from currency import get_month_ordinal, to_float_column
 
 def create_csv_files(data_dict, titles):
     """Создает csv-файлы с данными по годам
@@ -14,19 +22,180 @@ def create_csv_files(data_dict, titles):
             writer.writerow(titles)
             writer.writerows(item[1])
 
-def parse_by_years(rows,titles):
-    """Разбивает данные о вакансиях по годам публикации,
-    создавая для каждого года отдельный csv-файл
+class PartitionWriter:
+    """Класс для потоковой записи строк в отдельные csv-файлы по годам или месяцам.
+    Для каждого файла держится открытый буферизованный writer; если открытых файлов
+    больше max_open_files, дольше всех не использовавшийся файл закрывается
+    и при необходимости открывается снова на дозапись
+
+    Attributes:
+        folder (str): папка для файлов
+        titles (list): заголовки столбцов
+        date_index (int): индекс столбца с датой публикации
+        by_month (bool): разбивать данные по месяцам, а не по годам
+        max_open_files (int): максимальное количество одновременно открытых файлов
+        buffer_size (int): размер буфера записи каждого файла в байтах
+        files (OrderedDict): ключ -> (файл, writer) в порядке последнего использования
+        created (set): ключи уже созданных файлов
+    """
+    def __init__(self, folder, titles, by_month=False, max_open_files=64, buffer_size=65536):
+        """Инициализирует объект PartitionWriter
+
+        Args:
+            folder (str): папка для файлов
+            titles (list): заголовки столбцов
+            by_month (bool): разбивать данные по месяцам, а не по годам
+            max_open_files (int): максимальное количество одновременно открытых файлов
+            buffer_size (int): размер буфера записи каждого файла в байтах
+        """
+        self.folder = folder
+        self.titles = titles
+        self.date_index = titles.index('published_at')
+        self.by_month = by_month
+        self.max_open_files = max_open_files
+        self.buffer_size = buffer_size
+        self.files = OrderedDict()
+        self.created = set()
+
+    def get_key(self, row):
+        """Получает ключ файла для строки: год (ГГГГ) или месяц (ГГГГ-ММ) публикации
+
+        Args:
+            row (list): строка с данными о вакансии
+        Returns:
+            str: ключ файла
+        """
+        return row[self.date_index][0:7 if self.by_month else 4]
+
+    def get_writer(self, key):
+        """Получает writer для файла с заданным ключом, открывая файл при необходимости
+
+        Args:
+            key (str): ключ файла
+        Returns:
+            csv.writer: объект для записи строк в файл
+        """
+        if key in self.files:
+            self.files.move_to_end(key)
+            return self.files[key][1]
+        if len(self.files) >= self.max_open_files:
+            self.files.popitem(last=False)[1][0].close()
+
+        file_name = os.path.join(self.folder, f"{key}.csv")
+        if key in self.created:
+            file = open(file_name, 'a', encoding='utf-8', newline='', buffering=self.buffer_size)
+            writer = csv.writer(file, lineterminator="\r")
+        else:
+            file = open(file_name, 'w', encoding='utf-8-sig', newline='', buffering=self.buffer_size)
+            writer = csv.writer(file, lineterminator="\r")
+            writer.writerow(self.titles)
+            self.created.add(key)
+        self.files[key] = (file, writer)
+        return writer
+
+    def write(self, row):
+        """Записывает строку в файл, соответствующий дате ее публикации
+
+        Args:
+            row (list): строка с данными о вакансии
+        """
+        self.get_writer(self.get_key(row)).writerow(row)
+
+    def close(self):
+        """Закрывает все открытые файлы"""
+        while self.files:
+            self.files.popitem()[1][0].close()
+
+def save_columnar_partition(file_name, folder):
+    """Сохраняет csv-файл с данными за год в двоичном столбцовом формате:
+    каждый столбец - отдельный файл .npy, который можно отобразить в память.
+    Текстовые поля очищаются от html-тегов и кодируются номерами категорий
+
+    Args:
+        file_name (str): имя csv-файла
+        folder (str): папка для файлов столбцов
+    """
+    titles = reader.read_titles(file_name)
+    indexes = [titles.index(title) for title in
+               ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at')]
+    rows = reader.iter_rows(file_name, only_correct=False)
+    columns = list(zip(*([row[i] for i in indexes] for row in rows))) or [()] * len(indexes)
+    name, salary_from, salary_to, currency, area, published_at = columns
+
+    name_codes, names = pd.factorize(np.array([reader.clear_str(value) for value in name], dtype=object))
+    area_codes, areas = pd.factorize(np.array([reader.clear_str(value) for value in area], dtype=object))
+    currency_codes, currencies = pd.factorize(np.array(currency, dtype=object))
+    data = {'salary_from': to_float_column(salary_from),
+            'salary_to': to_float_column(salary_to),
+            'currency_codes': currency_codes.astype(np.int32),
+            'currencies': np.array(currencies, dtype=str),
+            'months': np.array([get_month_ordinal(date) for date in published_at], dtype=np.int32),
+            'area_codes': area_codes.astype(np.int32),
+            'areas': np.array(areas, dtype=str),
+            'name_codes': name_codes.astype(np.int32),
+            'names': np.array(names, dtype=str)}
+
+    os.makedirs(folder, exist_ok=True)
+    for column, values in data.items():
+        np.save(os.path.join(folder, f"{column}.npy"), values, allow_pickle=False)
+    with open(os.path.join(folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(get_csv_signature(file_name), f)
+
+def get_csv_signature(file_name):
+    """Получает размер и время изменения csv-файла, по которым проверяется
+    актуальность двоичной партиции
+
+    Args:
+        file_name (str): имя csv-файла
+    Returns:
+        dict: размер (size) и время изменения в наносекундах (mtime)
+    """
+    stat = os.stat(file_name)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+def is_partition_current(file_name, folder):
+    """Проверяет, что двоичная партиция записана по текущей версии csv-файла
+
+    Args:
+        file_name (str): имя csv-файла
+        folder (str): папка партиции
+    Returns:
+        bool: истина, если манифест партиции совпадает с размером и временем изменения файла
+    """
+    manifest = os.path.join(folder, 'manifest.json')
+    if not os.path.exists(manifest):
+        return False
+    with open(manifest, 'r', encoding='utf-8') as f:
+        return json.load(f) == get_csv_signature(file_name)
+
+def parse_by_years(rows, titles, by_month=False, max_open_files=64, folder='years_data', columnar=False):
+    """Разбивает данные о вакансиях по годам (или месяцам) публикации,
+    потоково записывая каждую строку в отдельный csv-файл по мере чтения
 
         Args:
-            rows (list): строки, считанные из общей выгрузки
+            rows (iterable): строки, считанные из общей выгрузки
             titles (list): заголовки столбцов
+            by_month (bool): разбивать данные по месяцам, а не по годам
+            max_open_files (int): максимальное количество одновременно открытых файлов
+            folder (str): папка для файлов
+            columnar (bool): дополнительно сохранить каждый файл в двоичном столбцовом
+            формате (см. save_columnar_partition) в папку с тем же именем; если False,
+            устаревшие партиции перезаписанных файлов удаляются
+        Returns:
+            list: ключи созданных файлов в порядке сортировки
     """
-    years_dict = {}
-    date_index = titles.index('published_at')
-    for row in rows:
-        year = f"{row[date_index][0:4]}.csv"
-        if year not in years_dict.keys():
-            years_dict[year] = []
-        years_dict[year].append(row)
-    create_csv_files(years_dict,titles)
+    os.makedirs(folder, exist_ok=True)
+    writer = PartitionWriter(folder, titles, by_month, max_open_files)
+    try:
+        for row in rows:
+            writer.write(row)
+    finally:
+        writer.close()
+    keys = sorted(writer.created)
+    for key in keys:
+        partition = os.path.join(folder, key)
+        if columnar:
+            save_columnar_partition(os.path.join(folder, f"{key}.csv"), partition)
+        elif os.path.isdir(partition):
+            shutil.rmtree(partition)
+    return keys
@@ -1,78 +1,246 @@
 import re
 import csv
 import os
-from currency import Currency
+import random
+import currency as cur
 
-def csv_reader(file_name):
-    """Считывает данные из csv-файла
+TAG_PATTERN = re.compile(r"<[^>]*>")
+RAW_FIELDS = frozenset(['salary_from', 'salary_to', 'published_at'])
+
+def read_titles(file_name):
+    """Считывает заголовки столбцов csv-файла
 
        Args:
            file_name (str): название csv-файла
 
        Returns:
-           tuple: (считанные строки, заголовки строк)
+           list: заголовки столбцов (пустой список для пустого файла)
     """
+    if os.stat(file_name).st_size == 0:
+        return []
     with open(file_name, 'r', encoding='utf-8-sig') as file:
-        data = list(csv.reader(file))
+        return next(csv.reader(file), [])
+
+def is_correct_row(row, count):
+    """Проверяет, что в строке заполнены все поля и их количество совпадает с числом заголовков
+
+       Args:
+           row (list): строка, считанная из файла
+           count (int): количество заголовков
+       Returns:
+           bool: истина, если строка корректна
+    """
+    return '' not in row and len(row) == count
+
+def iter_rows(file_name, only_correct=True):
+    """Лениво считывает строки csv-файла (без заголовков), не загружая файл в память целиком
 
-        titles = data[0] if (os.stat(file_name).st_size != 0) else []
-        count = len(titles)
+       Args:
+           file_name (str): название csv-файла
+           only_correct (bool): возвращать только корректные строки (см. is_correct_row)
+
+       Yields:
+           list: очередная строка файла
+    """
+    if os.stat(file_name).st_size == 0:
+        return
+    with open(file_name, 'r', encoding='utf-8-sig') as file:
+        data = csv.reader(file)
+        count = len(next(data, []))
+        for row in data:
+            if not only_correct or is_correct_row(row, count):
+                yield row
 
-        all_rows = data[1:]
-        rows = [row for row in all_rows if '' not in row and len(row) == count]
-        return {'all_rows': all_rows,
-                'rows': rows,
-                'titles': titles}
+class CsvRows:
+    """Повторно итерируемый источник строк csv-файла: каждый проход заново читает файл
+
+       Attributes:
+           file_name (str): название csv-файла
+           only_correct (bool): возвращать только корректные строки
+    """
+    def __init__(self, file_name, only_correct=True):
+        """Инициализирует источник строк
+
+           Args:
+               file_name (str): название csv-файла
+               only_correct (bool): возвращать только корректные строки
+        """
+        self.file_name = file_name
+        self.only_correct = only_correct
+
+    def __iter__(self):
+        return iter_rows(self.file_name, self.only_correct)
+
+def csv_reader(file_name):
+    """Считывает данные из csv-файла
+
+       Args:
+           file_name (str): название csv-файла
+
+       Returns:
+           dict: все считанные строки, корректные строки и заголовки строк
+    """
+    titles = read_titles(file_name)
+    count = len(titles)
+    all_rows = list(iter_rows(file_name, only_correct=False))
+    rows = [row for row in all_rows if is_correct_row(row, count)]
+    return {'all_rows': all_rows,
+            'rows': rows,
+            'titles': titles}
 
 def clear_str(str_value):
-    """Очищает строку от html-тегов
+    """Очищает строку от html-тегов. Регулярное выражение применяется
+    только к строкам, в которых есть символ '<'
 
        Args:
            str_value (str): входная строка
        Returns:
            str: строка без html-тегов
     """
-    return ' '.join(re.sub(r"\<[^>]*\>", '', str_value).split())
+    if '<' in str_value:
+        str_value = TAG_PATTERN.sub('', str_value)
+    return ' '.join(str_value.split())
 
-def add_100_vacancies_to_csv(vacancies):
-    """Добавляет первые 100 считанных вакансий в csv-файл
+def get_cleaned_indexes(titles):
+    """Получает индексы столбцов, которые нужно очищать от html-тегов.
+    Числовые столбцы и столбцы с датами (RAW_FIELDS) не очищаются
+
+       Args:
+           titles (list): заголовки столбцов
+       Returns:
+           list: индексы текстовых столбцов
+    """
+    return [i for i, title in enumerate(titles) if title not in RAW_FIELDS]
+
+def get_projection(titles, columns=None):
+    """Получает индексы и заголовки столбцов, которые нужно загрузить
+
+       Args:
+           titles (list): заголовки столбцов
+           columns (iterable): названия нужных столбцов; None - все столбцы
+       Returns:
+           tuple: (индексы нужных столбцов, их заголовки в порядке файла)
+    """
+    if columns is None:
+        return list(range(len(titles))), list(titles)
+    indexes = [i for i, title in enumerate(titles) if title in columns]
+    return indexes, [titles[i] for i in indexes]
+
+def add_100_vacancies_to_csv(vacancies, file_name="100vacancies.csv"):
+    """Добавляет выборку считанных вакансий в csv-файл
 
         Args:
             vacancies (list): строки с информацией о вакансиях
+            file_name (str): название csv-файла
     """
-    with open("100vacancies.csv", 'w', encoding='utf-8-sig') as f:
+    with open(file_name, 'w', encoding='utf-8-sig') as f:
         writer = csv.writer(f, lineterminator="\r")
         writer.writerow(['name', 'salary', 'area_name','published_at'])
         writer.writerows(vacancies)
 
-def csv_filer(rows, titles, create_vacancy):
-    """Форматирует данные, считанные из csv-файла, формирует из них
-    список объектов Vacancy и записывает первые 100 строк в csv-файл
+class SampleSink:
+    """Класс для сбора выборки вакансий при загрузке и ее записи в csv-файл.
+    Стратегия 'head' сохраняет первые size вакансий, стратегия 'reservoir' -
+    равномерную случайную выборку из всего потока (резервуарная выборка)
+
+       Attributes:
+           size (int): размер выборки
+           strategy (str): стратегия выборки: 'head' или 'reservoir'
+           file_name (str): название csv-файла для выборки
+           random (random.Random): генератор случайных чисел
+           count (int): количество просмотренных вакансий
+           rows (list): строки выборки
+    """
+    strategies = ('head', 'reservoir')
+
+    def __init__(self, size=100, strategy='head', file_name="100vacancies.csv", seed=None):
+        """Инициализирует объект SampleSink
+
+           Args:
+               size (int): размер выборки
+               strategy (str): стратегия выборки: 'head' или 'reservoir'
+               file_name (str): название csv-файла для выборки
+               seed (int): начальное значение генератора случайных чисел
+        """
+        if strategy not in self.strategies:
+            raise ValueError(f"Неизвестная стратегия выборки: {strategy}")
+        self.size = size
+        self.strategy = strategy
+        self.file_name = file_name
+        self.random = random.Random(seed)
+        self.count = 0
+        self.rows = []
+
+    def add(self, row):
+        """Учитывает очередную вакансию в выборке
+
+           Args:
+               row (list): строка с информацией о вакансии
+        """
+        self.count += 1
+        if len(self.rows) < self.size:
+            self.rows.append(row)
+        elif self.strategy == 'reservoir':
+            i = self.random.randrange(self.count)
+            if i < self.size:
+                self.rows[i] = row
+
+    def save(self):
+        """Записывает выборку в csv-файл"""
+        add_100_vacancies_to_csv(self.rows, self.file_name)
+
+def iter_vacancies(rows, titles, create_vacancy, rates, columns=None):
+    """Лениво форматирует строки, считанные из csv-файла, и создает из них объекты Vacancy.
+    Если задана проекция columns, очищаются и попадают в словарь вакансии только эти столбцы.
+    Остальные свойства вакансии равны None; в таблицу table.py они все равно не выводятся
+    и на высоту строк не влияют (см. table.InputConnect.create_table)
 
         Args:
-            rows (list): список строк, считанных из файла
+            rows (iterable): строки, считанные из файла
+            titles (list): названия строк, считанных из файла
+            create_vacancy (function) : функция, создающая объект Vacancy
+            rates (CurrencyRates): курсы валют по месяцам
+            columns (iterable): названия нужных столбцов; None - все столбцы
+        Yields:
+            tuple: (объект Vacancy, словарь с данными вакансии)
+    """
+    projection, titles = get_projection(titles, columns)
+    indexes = get_cleaned_indexes(titles)
+    for row in rows:
+        if columns is not None:
+            row = [row[i] for i in projection]
+        for i in indexes:
+            field = row[i]
+            if '\n' in field:
+                row[i] = [clear_str(el) for el in field.split('\n')]
+            else:
+                row[i] = clear_str(field)
+        vac_dict = dict(zip(titles, row))
+        yield create_vacancy(vac_dict, rates), vac_dict
+
+def csv_filer(rows, titles, create_vacancy, columns=None, sample=None):
+    """Форматирует данные, считанные из csv-файла, и формирует из них
+    список объектов Vacancy. Если задан sample, выборка вакансий записывается в csv-файл
+
+        Args:
+            rows (iterable): строки, считанные из файла (список или генератор iter_rows)
             titles (list): названия строк, считанных из файла
             create_vacancy (function) : функция, создающая об]ект Vacancy
+            columns (iterable): названия нужных столбцов; None - все столбцы
+            sample (SampleSink): выборка вакансий; None - выборка не собирается
         Returns:
             list: список объектов Vacancy
     """
     result = []
-    hundred_vacancies = []
-    currency_dict = Currency.get_currency_data()
-    for line_num in range(len(rows)):
-        for i in range(len(rows[line_num])):
-            field = rows[line_num][i]
-            if field.find('\n') != -1:
-                rows[line_num][i] = [clear_str(el) for el in field.split('\n')]
-            else:
-                rows[line_num][i] = clear_str(field)
-        vac_dict = dict(zip(titles, rows[line_num]))
-        vacancy = create_vacancy(vac_dict, currency_dict)
-        if line_num < 100:
-            hundred_vacancies.append([vacancy.name, vacancy.salary, vacancy.area_name, vac_dict['published_at']])
+    rates = cur.Currency.get_rates()
+    vacancies = iter_vacancies(rows, titles, create_vacancy, rates, columns)
+    for vacancy, vac_dict in vacancies:
+        if sample is not None:
+            sample.add([vacancy.name, vacancy.salary, vacancy.area_name, vac_dict.get('published_at')])
         if vacancy.salary != '':
             result.append(vacancy)
-    add_100_vacancies_to_csv(hundred_vacancies)
+    if sample is not None:
+        sample.save()
     return result
 
 
@@ -1,30 +1,55 @@
 from collections import Counter
-from date_converter import convert_to_date
+from itertools import islice
+from date_converter import convert_to_dates
 from dateutil import rrule
-import xmltodict
+import numpy as np
 import pandas as pd
 import requests
-import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import csv_reader as reader
 import datetime
+import csv
+import os
+import io
+from xml.etree import ElementTree
 
 class Currency:
     """Представляет объект валюты
 
         Attributes:
-            vacancies (list) : строки, считанные из файла с вакансиями
+            vacancies (list or csv_reader.CsvRows) : строки, считанные из файла с вакансиями
             index (int): индекс, под которым находится валюта в каждой считанной строке
+            chunk_size (int): количество дат, преобразуемых за одну векторную операцию
+            rates (CurrencyRates): загруженные курсы валют (общие для всех объектов)
     """
     def __init__(self, rows, index):
         """Инициализирует объект валюты
 
             Args:
-                rows (list) : строки, считанные из файла с вакансиями
+                rows (list or csv_reader.CsvRows) : строки, считанные из файла с вакансиями;
+                    источник должен допускать несколько проходов
                 index (int): индекс, под которым находится валюта в каждой считанной строке
         """
         self.vacancies = rows
         self.index = index
 
+    chunk_size = 100000
+
+    rates = None
+
+    @staticmethod
+    def get_rates():
+        """Получает таблицу курсов валют, загружая ее из csv-файла только при первом вызове
+
+            Returns:
+                CurrencyRates: курсы валют по месяцам
+        """
+        if Currency.rates is None:
+            Currency.rates = CurrencyRates.from_currency_dict(Currency.get_currency_data())
+        return Currency.rates
+
     @staticmethod
     def get_currency_data():
         """Получает данные о вакансиях, формируя из них словарь
@@ -43,11 +68,26 @@ class Currency:
     def get_date_range(self, date_index):
         """Вычисляет диапазон дат: находит минимальную и максимальную дату в выгрузке
 
+            Args:
+                date_index (int): индекс, под которым находится поле с датой в выгрузке
             Returns:
                 tuple: (минимальная дата, максимальная дата)
         """
-        dates = [convert_to_date(row[date_index]) for row in self.vacancies]
-        return min(dates), max(dates)
+        min_date = None
+        max_date = None
+        rows = iter(self.vacancies)
+        while True:
+            column = [row[date_index] for row in islice(rows, self.chunk_size)]
+            if len(column) == 0:
+                break
+            dates = convert_to_dates(column)
+            chunk_min = dates.min().item()
+            chunk_max = dates.max().item()
+            if min_date is None or chunk_min < min_date:
+                min_date = chunk_min
+            if max_date is None or chunk_max > max_date:
+                max_date = chunk_max
+        return min_date, max_date
 
     def get_currency_frequency(self):
         """Получает частотность, с которой встречаются различные валюты
@@ -55,36 +95,222 @@ class Currency:
             Returns:
                 collections.Counter: частотность, с которой встречаются валюты из выгрузки
         """
-        return Counter([row[self.index] for row in self.vacancies])
+        return Counter(row[self.index] for row in self.vacancies)
 
     def select_most_frequent_currencies(self):
         """Выбирает вакансии, в которых валюта встречается чаще 5000 раз в выгрузке
 
             Returns:
-                list: вакансии, в которых валюта встречается чаще 5000 раз в выгрузке
+                tuple: (список валют, генератор вакансий, в которых валюта встречается
+                чаще 5000 раз в выгрузке)
         """
         currencies = self.get_currency_frequency()
         frequent_currencies = [cur[0] for cur in currencies.items() if cur[1] > 5000]
-        vacancies = [row for row in self.vacancies if row[self.index] in frequent_currencies]
+        vacancies = (row for row in self.vacancies if row[self.index] in frequent_currencies)
         return frequent_currencies, vacancies
 
-    def process_currencies(self, date_index):
+    def process_currencies(self, date_index, offline=False, workers=1):
         """Обрабатывает данные по валютам: выбирает из выгрузки вакансии с наибольшей
         частотностью валют и формирует файл с курсами валют по месяцам
 
             Args:
                 date_index (int): индекс, под которым находится поле с датой в выгрузке
+                offline (bool): брать курсы валют только из локального хранилища
+                workers (int): количество потоков для выгрузки курсов валют
             Returns:
-                list: вакансии с наибольшей частотностью валют
+                generator: вакансии с наибольшей частотностью валют
         """
         frequent_currencies, correct_rows = self.select_most_frequent_currencies()
         min_date, max_date = self.get_date_range(date_index)
 
-        uploader = Uploader(min_date, max_date, frequent_currencies)
+        uploader = Uploader(min_date, max_date, frequent_currencies, offline=offline, workers=workers)
         uploader.copy_currencies_from_bank_to_csv()
+        Currency.rates = None
 
         return correct_rows
 
+def get_month_ordinal(month):
+    """Получает порядковый номер месяца
+
+        Args:
+            month (str): дата, начинающаяся с месяца в формате ГГГГ-ММ
+        Returns:
+            int: номер месяца, считая от начала нашей эры
+    """
+    return int(month[0:4]) * 12 + int(month[5:7]) - 1
+
+def to_float_column(values):
+    """Преобразует столбец строк с числами в массив float64
+
+        Args:
+            values (list): числа или строки с числами ('' - значение не указано)
+        Returns:
+            numpy.ndarray: числа; nan для неуказанных значений
+    """
+    return pd.to_numeric(pd.Series(values, dtype=object).replace('', np.nan)).to_numpy(np.float64)
+
+class CurrencyRates:
+    """Класс для представления курсов валют в виде числовой матрицы
+    (номер месяца, код валюты) -> курс. Отсутствующие курсы хранятся как nan
+
+        Attributes:
+            first_month (int): порядковый номер первого месяца матрицы
+            currency_index (dict): код валюты -> номер столбца матрицы
+            values (numpy.ndarray): курсы валют (float64)
+    """
+    def __init__(self, first_month, currencies, values):
+        """Инициализирует таблицу курсов валют
+
+            Args:
+                first_month (int): порядковый номер первого месяца матрицы
+                currencies (list): коды валют в порядке столбцов матрицы
+                values (numpy.ndarray): курсы валют
+        """
+        self.first_month = first_month
+        self.currency_index = {currency: i for i, currency in enumerate(currencies)}
+        self.values = np.asarray(values, dtype=np.float64)
+
+    @classmethod
+    def from_currency_dict(cls, currency_dict):
+        """Создает таблицу из словаря курсов, полученного Currency.get_currency_data
+
+            Args:
+                currency_dict (dict): месяц -> {валюта: курс или ' '}
+            Returns:
+                CurrencyRates: курсы валют по месяцам
+        """
+        currencies = sorted({currency for month in currency_dict.values() for currency in month})
+        ordinals = [get_month_ordinal(month) for month in currency_dict]
+        first_month = min(ordinals, default=0)
+        months_count = max(ordinals, default=-1) - first_month + 1
+        values = np.full((months_count, len(currencies)), np.nan)
+        rates = cls(first_month, currencies, values)
+        for month, month_currency in currency_dict.items():
+            row = get_month_ordinal(month) - first_month
+            for currency, value in month_currency.items():
+                if value.strip() != '':
+                    values[row, rates.currency_index[currency]] = float(value)
+        return rates
+
+    def get_rate(self, month, currency):
+        """Получает курс валюты за месяц
+
+            Args:
+                month (str): месяц в формате ГГГГ-ММ
+                currency (str): код валюты
+            Returns:
+                float or None: курс валюты или None, если курса нет
+        """
+        row = get_month_ordinal(month) - self.first_month
+        column = self.currency_index.get(currency)
+        if column is None or not 0 <= row < len(self.values):
+            return None
+        rate = self.values[row, column]
+        return None if np.isnan(rate) else float(rate)
+
+    def convert(self, salary_from, salary_to, currencies, months):
+        """Переводит столбцы вилок окладов в рубли за один вызов
+
+            Args:
+                salary_from (list): нижние границы вилок ('' или nan, если не указаны)
+                salary_to (list): верхние границы вилок ('' или nan, если не указаны)
+                currencies (list): коды валют
+                months (list): даты публикации, начинающиеся с месяца в формате ГГГГ-ММ
+            Returns:
+                numpy.ndarray: средние зарплаты в рублях; nan, если перевести оклад нельзя
+        """
+        salary_from = to_float_column(salary_from)
+        salary_to = to_float_column(salary_to)
+        names, codes = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        ordinals = np.array([get_month_ordinal(month) for month in months], dtype=np.int64)
+        return self.convert_codes(salary_from, salary_to, codes.reshape(-1), names, ordinals)
+
+    def convert_codes(self, salary_from, salary_to, currency_codes, currency_names, ordinals):
+        """Переводит в рубли числовые столбцы вилок окладов с валютами,
+        заданными кодами категорий, и месяцами, заданными порядковыми номерами
+
+            Args:
+                salary_from (numpy.ndarray): нижние границы вилок (nan, если не указаны)
+                salary_to (numpy.ndarray): верхние границы вилок (nan, если не указаны)
+                currency_codes (numpy.ndarray): номера валют в списке currency_names
+                currency_names (numpy.ndarray): коды валют
+                ordinals (numpy.ndarray): порядковые номера месяцев (см. get_month_ordinal)
+            Returns:
+                numpy.ndarray: средние зарплаты в рублях; nan, если перевести оклад нельзя
+        """
+        salary_from = np.where(np.isnan(salary_from), salary_to, salary_from)
+        salary_to = np.where(np.isnan(salary_to), salary_from, salary_to)
+        average = (salary_to + salary_from) / 2
+
+        currency_names = np.asarray(currency_names, dtype=str)
+        columns = np.array([self.currency_index.get(name, -1) for name in currency_names.tolist()],
+                           dtype=np.int64)[currency_codes]
+        rows = np.asarray(ordinals, dtype=np.int64) - self.first_month
+        known = (columns >= 0) & (rows >= 0) & (rows < len(self.values))
+        rates = np.full(len(average), np.nan)
+        rates[known] = self.values[rows[known], columns[known]]
+        rates[(currency_names == 'RUR')[currency_codes]] = 1.0
+        return average * rates
+
+class RatesStore:
+    """Класс для представления локального хранилища курсов валют по месяцам
+
+        Attributes:
+            file_name (str): имя csv-файла хранилища
+            rates (dict): (месяц, валюта) -> курс валюты или None, если у банка нет курса
+    """
+    def __init__(self, file_name='csv/currency_rates_store.csv'):
+        """Инициализирует хранилище и загружает ранее сохраненные курсы
+
+            Args:
+                file_name (str): имя csv-файла хранилища
+        """
+        self.file_name = file_name
+        self.rates = {}
+        if os.path.exists(file_name):
+            for month, currency, value in reader.iter_rows(file_name, only_correct=False):
+                self.rates[(month, currency)] = float(value) if value != '' else None
+
+    def get_month(self, month, currencies):
+        """Получает курсы валют за месяц, если они есть в хранилище для всех заданных валют
+
+            Args:
+                month (str): месяц в формате ГГГГ-ММ
+                currencies (list): список валют
+            Returns:
+                dict or None: валюта -> курс (валюты без курса пропускаются);
+                None, если хотя бы одной валюты нет в хранилище
+        """
+        month_currency = {}
+        for currency in currencies:
+            if (month, currency) not in self.rates:
+                return None
+            if self.rates[(month, currency)] is not None:
+                month_currency[currency] = self.rates[(month, currency)]
+        return month_currency
+
+    def add_month(self, month, month_currency, currencies):
+        """Добавляет в хранилище курсы валют за месяц
+
+            Args:
+                month (str): месяц в формате ГГГГ-ММ
+                month_currency (dict): валюта -> курс
+                currencies (list): список запрошенных валют
+        """
+        for currency in currencies:
+            self.rates[(month, currency)] = month_currency.get(currency)
+
+    def save(self):
+        """Сохраняет хранилище в csv-файл, создавая его папку при необходимости"""
+        folder = os.path.dirname(self.file_name)
+        if folder != '':
+            os.makedirs(folder, exist_ok=True)
+        with open(self.file_name, 'w', encoding='utf-8-sig') as f:
+            writer = csv.writer(f, lineterminator="\r")
+            writer.writerow(['month', 'currency', 'value'])
+            for (month, currency), value in sorted(self.rates.items()):
+                writer.writerow([month, currency, '' if value is None else value])
+
 class Uploader:
     """Класс для представления загрузчика данных по валютам, выгруженных с внешних источников
 
@@ -93,19 +319,37 @@ class Uploader:
             max_date (datetime.datetime): верхняя граница временного диапазона
             currency_names (list): список валют
             upload_dict (dict): словарь для данных выгрузки
+            store (RatesStore): локальное хранилище курсов валют
+            offline (bool): не обращаться к сайту центробанка
+            workers (int): количество потоков для одновременной выгрузки месяцев
+            session (requests.Session): сессия с пулом соединений для запросов к центробанку
+            bank_url (str): адрес выгрузки курсов валют центробанка
+            timeout (int): время ожидания ответа центробанка в секундах
+            retries (int): количество повторов запроса при ошибке соединения или ответа сервера
     """
-    def __init__(self, min_date, max_date, currency_list):
+    bank_url = 'http://www.cbr.ru/scripts/XML_daily.asp'
+    timeout = 10
+    retries = 3
+
+    def __init__(self, min_date, max_date, currency_list, store=None, offline=False, workers=1):
         """Инициализирует объект загрузчика данных по валютам
 
         Attributes:
             min_date (datetime.datetime): нижняя граница временного диапазона
             max_date (datetime.datetime): верхняя граница временного диапазона
             currency_list (list): список валют
+            store (RatesStore): локальное хранилище курсов валют
+            offline (bool): брать курсы только из хранилища и не обращаться к сайту центробанка
+            workers (int): количество потоков для одновременной выгрузки месяцев
         """
         self.min_date = min_date
         self.max_date = max_date
         self.currency_names = ['date'] + currency_list
         self.upload_dict = {item: [] for item in self.currency_names}
+        self.store = store if store is not None else RatesStore()
+        self.offline = offline
+        self.workers = workers
+        self.session = None
 
     def check_empty_fields(self, max_length):
         """Проверяет наличие пустых полей в выгрузке и,
@@ -118,43 +362,129 @@ class Uploader:
         for key in empty_fields:
             self.upload_dict[key].append(' ')
 
+    def get_session(self):
+        """Получает сессию с пулом keep-alive соединений и повтором неудачных запросов
+
+            Returns:
+                requests.Session: сессия для запросов к центробанку
+        """
+        if self.session is None:
+            retry = Retry(total=self.retries, backoff_factor=0.5,
+                          status_forcelist=(500, 502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.workers, 1), max_retries=retry)
+            self.session = requests.Session()
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        return self.session
+
     def upload_data(self, date):
-        """Выгружает данные по валютам с сайта центробанка
+        """Выгружает курсы выбранных валют с сайта центробанка
 
             Args:
                 date (datetime.datetime): дата, которой соответствуют значения валют
             Returns:
-                dict: словарь с данными выгрузки по валютам в заданный период
+                dict: валюта -> курс
         """
         str_date = date.strftime("%d/%m/%Y")
-        url = f"http://www.cbr.ru/scripts/XML_daily.asp?date_req={str_date}"
-        response = requests.get(url).text
-        json_text = json.dumps(xmltodict.parse(response))
-        return eval(json_text)['ValCurs']['Valute']
+        url = f"{self.bank_url}?date_req={str_date}"
+        response = self.get_session().get(url, timeout=self.timeout)
+        return self.parse_currencies(response.content)
+
+    def parse_currencies(self, content):
+        """Потоково разбирает XML-ответ центробанка, извлекая только CharCode и Value
+        выбранных валют
+
+            Args:
+                content (bytes): тело ответа XML_daily.asp
+            Returns:
+                dict: валюта -> курс
+        """
+        currency_list = self.currency_names[1:]
+        month_currency = {}
+        char_code = None
+        for event, element in ElementTree.iterparse(io.BytesIO(content), events=('end',)):
+            if element.tag == 'CharCode':
+                char_code = element.text
+            elif element.tag == 'Value' and char_code in currency_list:
+                month_currency[char_code] = float(element.text.replace(',', '.'))
+            elif element.tag == 'Valute':
+                char_code = None
+                element.clear()
+        return month_currency
+
+    def get_month_currency(self, date):
+        """Получает курсы валют за месяц: сначала из локального хранилища,
+        а при их отсутствии - с сайта центробанка
+
+            Args:
+                date (datetime.datetime): дата, которой соответствуют значения валют
+            Returns:
+                dict: валюта -> курс
+        """
+        month = date.strftime("%Y-%m")
+        currency_list = self.currency_names[1:]
+        month_currency = self.store.get_month(month, currency_list)
+        if month_currency is not None:
+            return month_currency
+        if self.offline:
+            raise LookupError(f"Нет курсов валют за {month} в локальном хранилище {self.store.file_name}")
+
+        month_currency = self.upload_data(date)
+        self.store.add_month(month, month_currency, currency_list)
+        return month_currency
+
+    def prefetch_months(self, dates):
+        """Одновременно выгружает в хранилище курсы за месяцы, которых в нем нет.
+        Количество одновременных запросов ограничено числом потоков workers
+
+            Args:
+                dates (list): даты, за которые нужны курсы валют
+        """
+        currency_list = self.currency_names[1:]
+        missing = [date for date in dates
+                   if self.store.get_month(date.strftime("%Y-%m"), currency_list) is None]
+        if self.offline or self.workers <= 1 or len(missing) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for date, month_currency in zip(missing, executor.map(self.upload_data, missing)):
+                self.store.add_month(date.strftime("%Y-%m"), month_currency, currency_list)
 
     def add_data_to_dictionary(self, month_currency, date):
         """Добавляет выгруженные данные по валютам в словарь для выгрузки
 
             Args:
-                month_currency (dict): данные по валютам за один месяц
+                month_currency (dict): курсы валют за один месяц
                 date (datetime.datetime): дата, за которую были выгружены данные
         """
         self.upload_dict['date'].append(date.strftime("%Y-%m"))
-        max_length = 0
+        max_length = len(self.upload_dict['date'])
         for item in month_currency.items():
-            self.upload_dict[item[0]].append(float(item[1].replace(',', '.')))
+            self.upload_dict[item[0]].append(item[1])
             length = len(self.upload_dict[item[0]])
             max_length = max(max_length, length)
         self.check_empty_fields(max_length)
 
+    def collect_currencies(self):
+        """Заполняет словарь для выгрузки курсами валют за каждый месяц диапазона.
+        Хранилище сохраняется и при ошибке выгрузки, но ошибка сохранения
+        в этом случае не заменяет исходную ошибку"""
+        self.max_date += datetime.timedelta(weeks=4)
+        dates = list(rrule.rrule(rrule.MONTHLY, dtstart=self.min_date, until=self.max_date))
+        try:
+            self.prefetch_months(dates)
+            for dt in dates:
+                self.add_data_to_dictionary(self.get_month_currency(dt), dt)
+        except BaseException:
+            try:
+                self.store.save()
+            except OSError as error:
+                print(f'Не удалось сохранить хранилище курсов валют: {error}')
+            raise
+        self.store.save()
+
     def copy_currencies_from_bank_to_csv(self):
         """Получает выгрузку по валютам с сайта центробанка и сохраняет в csv-файл"""
-
-        self.max_date += datetime.timedelta(weeks=4)
-        for dt in rrule.rrule(rrule.MONTHLY, dtstart=self.min_date, until=self.max_date):
-            currencies = self.upload_data(dt)
-            month_currency = {cur['CharCode']: cur['Value'] for cur in currencies if cur['CharCode'] in self.currency_names}
-            self.add_data_to_dictionary(month_currency, dt)
+        self.collect_currencies()
 
         frame = pd.DataFrame(self.upload_dict)
         frame.reset_index(drop=True, inplace=True)
@@ -1,6 +1,8 @@
 import maya
 import arrow
 import datetime
+import functools
+import numpy as np
 from datetime import datetime as module_dt
 from dateutil.parser import parse as dt_parser
 import cProfile
@@ -21,24 +23,112 @@ def profile(func):
 
     return wrapper
 
+def is_hh_date(str_date):
+    """Проверяет, что дата записана в формате выгрузки hh.ru: ГГГГ-ММ-ДДTЧЧ:ММ:СС+ЧЧММ
+
+    Args:
+        str_date (str): дата и время
+    Returns:
+        bool: истина, если строка соответствует формату
+    """
+    return (len(str_date) == 24 and str_date[10] == 'T'
+            and str_date[19] in '+-' and str_date[20:24].isdigit())
+
 def convert_to_date(str_date):
-    """Преобразует дату и время из строки в формат даты-времени с помощью
-    утилиты dateutil.parser
+    """Преобразует дату и время из строки в формат даты-времени.
+    Результаты запоминаются в ограниченном LRU-кэше (см. configure_date_cache),
+    поэтому повторяющиеся даты не разбираются заново
 
     Args:
         str_date (str): дата и время
     Returns:
          datetime.datetime: дата и время с учетом часового пояса
     """
-    date = dt_parser(str_date, ignoretz=True)
+    return cached_parse_date(str_date)
 
-    parts = str_date.split('T')
-    time = parts[1]
-    operation = time[8]
-    delta = datetime.timedelta(hours=int(time[9:11]), minutes=int(time[11::]))
+def parse_date(str_date):
+    """Разбирает дату и время из строки без использования кэша.
+    Строки в формате hh.ru разбираются срезами, остальные - с помощью утилиты dateutil.parser
 
-    return date + delta if operation == '+' else date - delta
+    Args:
+        str_date (str): дата и время
+    Returns:
+         datetime.datetime: дата и время с учетом часового пояса
+    """
+    if is_hh_date(str_date):
+        try:
+            date = module_dt.fromisoformat(str_date[0:19])
+        except ValueError:
+            return convert_to_date_dateutil(str_date)
+        delta = datetime.timedelta(hours=int(str_date[20:22]), minutes=int(str_date[22:24]))
+        return date + delta if str_date[19] == '+' else date - delta
+    return convert_to_date_dateutil(str_date)
+
+DATE_CACHE_SIZE = 65536
+cached_parse_date = functools.lru_cache(maxsize=DATE_CACHE_SIZE)(parse_date)
+
+def configure_date_cache(maxsize=DATE_CACHE_SIZE):
+    """Пересоздает кэш дат с новым размером (счетчики попаданий и промахов обнуляются)
+
+    Args:
+        maxsize (int or None): максимальное количество запоминаемых дат;
+        0 отключает кэш, None снимает ограничение
+    """
+    global cached_parse_date
+    cached_parse_date = functools.lru_cache(maxsize=maxsize)(parse_date)
+
+def get_date_cache_info():
+    """Получает статистику кэша дат
+
+    Returns:
+        functools._CacheInfo: количество попаданий (hits), промахов (misses),
+        максимальный (maxsize) и текущий (currsize) размер кэша
+    """
+    return cached_parse_date.cache_info()
+
+def convert_to_date_dateutil(str_date):
+    """Преобразует дату и время из строки произвольного формата с помощью утилиты dateutil.parser
+
+    Args:
+        str_date (str): дата и время
+    Returns:
+         datetime.datetime: дата и время с учетом часового пояса
+    """
+    date = dt_parser(str_date)
+    delta = date.utcoffset()
+    date = date.replace(tzinfo=None)
+    return date + delta if delta else date
+
+def convert_to_dates(str_dates):
+    """Преобразует столбец дат из строк в массив numpy.datetime64 за одну векторную операцию.
+    Каждая уникальная дата столбца разбирается один раз.
+    Строки не в формате hh.ru преобразуются поштучно функцией convert_to_date
+
+    Args:
+        str_dates (list): даты и время
+    Returns:
+        numpy.ndarray: даты и время с учетом часового пояса (datetime64[s])
+    """
+    values, inverse = np.unique(np.asarray(str_dates, dtype=str), return_inverse=True)
+    result = np.empty(len(values), dtype='datetime64[s]')
+    if len(values) == 0:
+        return result
+
+    mask = np.array([is_hh_date(value) for value in values.tolist()], dtype=bool)
+    correct = values[mask].astype('U24')
+    try:
+        local = correct.astype('U19').astype('datetime64[s]')
+    except ValueError:
+        mask[:] = False
+    else:
+        digits = correct.view(np.uint32).reshape(-1, 24).astype(np.int64) - ord('0')
+        minutes = (digits[:, 20] * 10 + digits[:, 21]) * 60 + digits[:, 22] * 10 + digits[:, 23]
+        sign = np.where(digits[:, 19] == ord('+') - ord('0'), 1, -1)
+        result[mask] = local + (sign * minutes).astype('timedelta64[m]')
 
+    for i in np.flatnonzero(~mask):
+        result[i] = np.datetime64(convert_to_date(values[i]), 's')
+    return result[inverse.reshape(-1)]
 
 '''
 def make_date_format_strptime(self, str_date):
@@ -1,21 +1,100 @@
+import os
 import csv
+import json
+import time
+import argparse
+import threading
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import timedelta, datetime
+
+class RateLimiter:
+    """Класс для ограничения частоты запросов, общего для всех потоков загрузчика
+
+        Attributes:
+            interval (float): минимальный промежуток между запросами в секундах
+            next_time (float): время, раньше которого нельзя отправить следующий запрос
+            lock (threading.Lock): блокировка для доступа к next_time из разных потоков
+    """
+    def __init__(self, requests_per_second):
+        """Инициализирует ограничитель частоты запросов
+
+            Args:
+                requests_per_second (float): максимальное количество запросов в секунду
+        """
+        self.interval = 1 / requests_per_second
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Ожидает, пока можно будет отправить очередной запрос"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        time.sleep(start - now)
+
 class HhDownloader:
-    """Класс для представления загрузчика вакансий с HeadHunter
+    """Класс для представления загрузчика вакансий с HeadHunter.
+    Период выгрузки делится на временные окна по количеству найденных вакансий.
+    Вакансии дописываются в csv-файл по мере получения страниц, а номер последней
+    записанной страницы сохраняется в файл контрольной точки, чтобы после сбоя
+    продолжить выгрузку с того же места. Окна могут выгружаться одновременно
+    в нескольких потоках, при этом в файл они записываются по порядку
 
         Attributes:
-            vacancies (list): строки с выгруженным данными о вакансиях
+            file_name (str): имя csv-файла с выгруженными вакансиями
+            checkpoint_name (str): имя файла контрольной точки
+            plan_name (str): имя файла с планом временных окон
+            job (dict): период выгрузки и имя csv-файла, сохраняемые в контрольной точке и плане
+            workers (int): количество потоков для одновременной выгрузки временных окон
+            file (TextIO): открытый на дозапись csv-файл
+            writer (csv.writer): объект для записи строк в csv-файл
+            session (requests.Session): сессия с пулом соединений
+            limiter (RateLimiter): ограничитель частоты запросов
+            api_url (str): адрес API вакансий hh.ru
+            per_page (int): количество вакансий на странице
+            pages (int): максимальное количество страниц в одной выдаче
+            min_window (timedelta): минимальная длина временного окна
+            requests_per_second (float): максимальная частота запросов
+            timeout (int): время ожидания ответа в секундах
+            retries (int): количество повторов запроса при ошибке соединения или ответа сервера
     """
-    def __init__(self):
-        """Инициализирует объект загрузчика данных по валютам
+    titles = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+    api_url = 'https://api.hh.ru/vacancies'
+    per_page = 100
+    pages = 20
+    min_window = timedelta(minutes=1)
+    requests_per_second = 10
+    timeout = 10
+    retries = 3
+
+    def __init__(self, file_name='hh_vacancies.csv', checkpoint_name=None, workers=1):
+        """Инициализирует объект загрузчика вакансий
+
+            Args:
+                file_name (str): имя csv-файла с выгруженными вакансиями
+                checkpoint_name (str): имя файла контрольной точки
+                (по умолчанию <имя csv-файла>.checkpoint.json)
+                workers (int): количество потоков для одновременной выгрузки временных окон
         """
-        titles = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
-        self.vacancies = []
-        self.vacancies.append(titles)
+        self.file_name = file_name
+        if checkpoint_name is None:
+            checkpoint_name = f"{os.path.splitext(file_name)[0]}.checkpoint.json"
+        self.checkpoint_name = checkpoint_name
+        self.plan_name = f"{os.path.splitext(checkpoint_name)[0]}_plan.json"
+        self.workers = workers
+        self.job = None
+        self.file = None
+        self.writer = None
+        self.session = None
+        self.limiter = None
 
-    def add_vacancy_to_list(self, vacancy):
-        """Добавляет даныне о вакансии в список
+    def add_vacancy_to_csv(self, vacancy):
+        """Дописывает данные о вакансии в csv-файл
 
             Args:
                 vacancy (dict): данные об одной вакансии
@@ -29,41 +108,314 @@ class HhDownloader:
             salary_to = salary['to']
             currency = salary['currency']
 
-        self.vacancies.append([vacancy['name'], salary_from, salary_to, currency,
-                               vacancy['area']['name'], vacancy['published_at']])
+        self.writer.writerow([vacancy['name'], salary_from, salary_to, currency,
+                              vacancy['area']['name'], vacancy['published_at']])
 
-    def send_request_one_hour(self, start, end):
-        """Отправляет запрос на получение 20 страниц с hh.ru в переданный временной диапазон
-        и записывает полученные данные в список с вакансиями
+    def get_job(self, date_from, date_to):
+        """Получает описание выгрузки, по которому контрольная точка и план
+        сопоставляются с текущим запуском
 
             Args:
-                start (str): начало временного диапазона (часы)
-                end (str) : конец временного диапазона (часы)
+                date_from (datetime): начало периода
+                date_to (datetime): конец периода
+            Returns:
+                dict: период выгрузки и имя csv-файла
         """
-        for page in range(20):
-            url = f"https://api.hh.ru/vacancies?specialization=1&per_page=100&page={page}" \
-                f"&date_from=2022-12-15T{start}:00:00&date_to={'2022-12-15' if end != '00' else '2022-12-16'}T{end}:00:00"
-            response = requests.get(url).json()
-            for vacancy in response['items']:
-                self.add_vacancy_to_list(vacancy)
-    def add_vacancies_to_csv(self):
-        """Добавляет вакансии в csv-файл
+        return {'date_from': date_from.isoformat(), 'date_to': date_to.isoformat(),
+                'file_name': os.path.abspath(self.file_name)}
+
+    def load_json(self, file_name, job):
+        """Загружает json-файл контрольной точки или плана, если он относится к той же выгрузке
+
+            Args:
+                file_name (str): имя файла
+                job (dict): описание текущей выгрузки (см. get_job)
+            Returns:
+                dict or None: данные файла; None, если файла нет или он относится
+                к другому периоду или другому csv-файлу
+        """
+        if not os.path.exists(file_name):
+            return None
+        with open(file_name, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('job') != job:
+            print(f"{file_name} относится к другой выгрузке, выгрузка начинается заново")
+            return None
+        return data
+
+    def load_checkpoint(self, job):
+        """Загружает контрольную точку
+
+            Args:
+                job (dict): описание текущей выгрузки (см. get_job)
+            Returns:
+                dict or None: номер последнего обработанного временного окна (window), номер
+                последней записанной страницы (page) и размер csv-файла после ее записи (size);
+                None, если контрольной точки нет, она относится к другой выгрузке
+                или csv-файла нет
         """
-        with open('hh_vacancies.csv', 'w', encoding='utf-8') as f:
-            writer = csv.writer(f, lineterminator="\r")
-            writer.writerows(self.vacancies)
-    def get_data_from_hh_ru(self):
-        """Получает данные с сайта hh.ru и сохраняет их в csv-файл"""
-        start_hour = datetime(2022, 12, 15, 00, 00)
-        last_hour = datetime(2022, 12, 16, 00, 00)
+        checkpoint = self.load_json(self.checkpoint_name, job)
+        if checkpoint is None or not os.path.exists(self.file_name):
+            return None
+        return checkpoint
 
-        while start_hour < last_hour:
-            next_hour = start_hour + timedelta(hours=1)
-            self.send_request_one_hour(
-                datetime.strftime(start_hour,'%H'), datetime.strftime(next_hour,'%H'))
-            start_hour = next_hour
+    def save_checkpoint(self, window, page):
+        """Атомарно сохраняет контрольную точку после записи страницы
+
+            Args:
+                window (int): номер временного окна, к которому относится страница
+                page (int): номер записанной страницы
+        """
+        self.file.flush()
+        self.save_json(self.checkpoint_name, {'job': self.job, 'window': window, 'page': page,
+                                              'size': self.file.tell()})
+
+    def save_json(self, file_name, data):
+        """Атомарно записывает данные в json-файл
+
+            Args:
+                file_name (str): имя файла
+                data (dict or list): данные
+        """
+        temp_name = f"{file_name}.tmp"
+        with open(temp_name, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_name, file_name)
+
+    def load_plan(self, date_from, date_to):
+        """Загружает сохраненный план временных окон той же выгрузки или составляет новый
+
+            Args:
+                date_from (datetime): начало периода
+                date_to (datetime): конец периода
+            Returns:
+                list: временные окна (начало, конец)
+        """
+        plan = self.load_json(self.plan_name, self.job)
+        if plan is not None:
+            return [(datetime.fromisoformat(start), datetime.fromisoformat(end))
+                    for start, end in plan['windows']]
+        windows = self.merge_windows(self.plan_windows(date_from, date_to))
+        windows = [(start, end) for start, end, found in windows if found > 0]
+        self.save_json(self.plan_name, {'job': self.job,
+                                        'windows': [[start.isoformat(), end.isoformat()]
+                                                    for start, end in windows]})
+        return windows
+
+    def count_vacancies(self, start, end):
+        """Получает количество вакансий, опубликованных во временном окне
+
+            Args:
+                start (datetime): начало окна
+                end (datetime): конец окна
+            Returns:
+                int: количество вакансий (поле found первой страницы)
+        """
+        return self.send_request(start, end, 0, per_page=1)['found']
+
+    def plan_windows(self, start, end):
+        """Рекурсивно делит временное окно пополам, пока количество вакансий в нем
+        превышает ограничение hh.ru на выдачу (per_page * pages)
+
+            Args:
+                start (datetime): начало окна
+                end (datetime): конец окна
+            Returns:
+                list: временные окна (начало, конец, количество вакансий)
+        """
+        found = self.count_vacancies(start, end)
+        if found <= self.per_page * self.pages or end - start <= self.min_window:
+            if found > self.per_page * self.pages:
+                print(f"Окно {start} - {end}: найдено {found} вакансий, будут выгружены не все")
+            return [(start, end, found)]
+        middle = start + (end - start) // 2
+        middle -= timedelta(microseconds=middle.microsecond)
+        return self.plan_windows(start, middle) + self.plan_windows(middle, end)
+
+    def merge_windows(self, windows):
+        """Объединяет соседние временные окна, пока суммарное количество вакансий
+        не превышает ограничение hh.ru на выдачу
+
+            Args:
+                windows (list): временные окна (начало, конец, количество вакансий)
+            Returns:
+                list: объединенные временные окна (начало, конец, количество вакансий)
+        """
+        result = []
+        for start, end, found in windows:
+            if len(result) != 0 and result[-1][2] + found <= self.per_page * self.pages:
+                result[-1] = (result[-1][0], end, result[-1][2] + found)
+            else:
+                result.append((start, end, found))
+        return result
+
+    def get_session(self):
+        """Получает сессию с пулом keep-alive соединений и повтором неудачных запросов
+
+            Returns:
+                requests.Session: сессия для запросов к hh.ru
+        """
+        if self.session is None:
+            retry = Retry(total=self.retries, backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.workers, 1), max_retries=retry)
+            self.session = requests.Session()
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.limiter = RateLimiter(self.requests_per_second)
+        return self.session
+
+    def send_request(self, start, end, page, per_page=None):
+        """Отправляет запрос на получение одной страницы вакансий за временное окно
+
+            Args:
+                start (datetime): начало окна
+                end (datetime): конец окна
+                page (int): номер страницы
+                per_page (int): количество вакансий на странице (по умолчанию - self.per_page)
+            Returns:
+                dict: ответ hh.ru (items - вакансии, found - количество вакансий,
+                pages - количество страниц)
+        """
+        date_from = datetime.strftime(start, '%Y-%m-%dT%H:%M:%S')
+        date_to = datetime.strftime(end, '%Y-%m-%dT%H:%M:%S')
+        url = f"{self.api_url}?specialization=1&per_page={per_page or self.per_page}&page={page}" \
+            f"&date_from={date_from}&date_to={date_to}"
+        session = self.get_session()
+        self.limiter.wait()
+        response = session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def send_request_window(self, window, first_page=0):
+        """Получает страницы с вакансиями за временное окно. Выгрузка
+        прекращается на первой неполной или последней странице
+
+            Args:
+                window (tuple): временное окно (начало, конец)
+                first_page (int): номер страницы, с которой нужно начать
+            Yields:
+                list: вакансии очередной страницы, начиная с first_page
+        """
+        for page in range(first_page, self.pages):
+            response = self.send_request(window[0], window[1], page)
+            yield response['items']
+            if len(response['items']) < self.per_page or page + 1 >= response.get('pages', self.pages):
+                break
+
+    def get_window_pages(self, window, first_page):
+        """Получает все страницы с вакансиями за временное окно. Выполняется в отдельном потоке
+
+            Args:
+                window (tuple): временное окно (начало, конец)
+                first_page (int): номер страницы, с которой нужно начать
+            Returns:
+                list: списки вакансий по страницам, начиная с first_page
+        """
+        return list(self.send_request_window(window, first_page))
+
+    def write_window(self, index, first_page, pages):
+        """Дописывает вакансии за временное окно в csv-файл, сохраняя контрольную точку
+        после каждой страницы
+
+            Args:
+                index (int): номер временного окна
+                first_page (int): номер первой страницы
+                pages (iterable): списки вакансий по страницам
+        """
+        for page, items in enumerate(pages, first_page):
+            for vacancy in items:
+                self.add_vacancy_to_csv(vacancy)
+            self.save_checkpoint(index, page)
+        self.save_checkpoint(index, self.pages - 1)
+
+    def iter_windows(self, windows, first_window, first_page):
+        """Выгружает временные окна и возвращает результаты по порядку. При одном потоке
+        страницы выгружаются лениво, по мере записи; при нескольких потоках одновременно
+        выгружается не больше workers окон, поэтому в памяти хранится ограниченное
+        количество страниц
+
+            Args:
+                windows (list): временные окна (начало, конец)
+                first_window (int): номер окна, с которого нужно начать
+                first_page (int): номер страницы, с которой нужно начать первое окно
+            Yields:
+                tuple: (номер окна, номер первой страницы, списки вакансий по страницам)
+        """
+        if self.workers <= 1:
+            for index in range(first_window, len(windows)):
+                page = first_page if index == first_window else 0
+                yield index, page, self.send_request_window(windows[index], page)
+            return
+        self.get_session()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = deque()
+            for index in range(first_window, len(windows)):
+                page = first_page if index == first_window else 0
+                futures.append((index, page, executor.submit(self.get_window_pages, windows[index], page)))
+                if len(futures) >= self.workers:
+                    index, page, future = futures.popleft()
+                    yield index, page, future.result()
+            while futures:
+                index, page, future = futures.popleft()
+                yield index, page, future.result()
+
+    def open_csv(self, checkpoint):
+        """Открывает csv-файл: при наличии контрольной точки - на дозапись, обрезая
+        строки, записанные после нее, иначе - заново с заголовками
+
+            Args:
+                checkpoint (dict or None): контрольная точка
+        """
+        if checkpoint is None:
+            self.file = open(self.file_name, 'w', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.file, lineterminator="\r")
+            self.writer.writerow(self.titles)
+            return
+        self.file = open(self.file_name, 'r+', encoding='utf-8', newline='')
+        self.file.seek(checkpoint['size'])
+        self.file.truncate()
+        self.writer = csv.writer(self.file, lineterminator="\r")
+
+    def get_data_from_hh_ru(self, date_from, date_to):
+        """Получает данные с сайта hh.ru за период и дописывает их в csv-файл,
+        продолжая с контрольной точки, если она есть. Период делится на временные окна,
+        в каждом из которых не больше вакансий, чем hh.ru отдает на один запрос
+
+            Args:
+                date_from (datetime): начало периода
+                date_to (datetime): конец периода
+        """
+        first_window = 0
+        first_page = 0
+        self.job = self.get_job(date_from, date_to)
+        checkpoint = self.load_checkpoint(self.job)
+        if checkpoint is not None:
+            first_window = checkpoint['window']
+            first_page = checkpoint['page'] + 1
+            if first_page >= self.pages:
+                first_window += 1
+                first_page = 0
 
-        self.add_vacancies_to_csv()
+        windows = self.load_plan(date_from, date_to)
+        self.open_csv(checkpoint)
+        try:
+            for index, page, pages in self.iter_windows(windows, first_window, first_page):
+                self.write_window(index, page, pages)
+        finally:
+            self.file.close()
+        for file_name in (self.checkpoint_name, self.plan_name):
+            if os.path.exists(file_name):
+                os.remove(file_name)
 
-hh_down = HhDownloader()
-hh_down.get_data_from_hh_ru()
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Выгрузка вакансий с hh.ru в csv-файл')
+    parser.add_argument('--date-from', type=datetime.fromisoformat, default=datetime(2022, 12, 15),
+                        help='начало периода, например 2022-12-15 или 2022-12-15T06:00:00')
+    parser.add_argument('--date-to', type=datetime.fromisoformat, default=datetime(2022, 12, 16),
+                        help='конец периода')
+    parser.add_argument('--workers', type=int, default=1, help='количество потоков')
+    parser.add_argument('--output', default='hh_vacancies.csv', help='имя csv-файла')
+    args = parser.parse_args()
+    hh_down = HhDownloader(args.output, workers=args.workers)
+    hh_down.get_data_from_hh_ru(args.date_from, args.date_to)
@@ -1,6 +1,9 @@
+import os
 import math
+import argparse
 import csv_reader as reader
 import csv_parts_creator as files_creator
+from functools import partial
 from multiprocessing import Pool
 from currency import Currency
 class DataSet:
@@ -12,7 +15,11 @@ class DataSet:
             file_name (str): имя файла, из которого считываются данные
             vacancies_objects (list): список вакансий
             connector (InputConnect): объект, отвечающий за формирование данных статистики
+            columnar (columnar.ColumnarDataSet): вакансии в виде столбцов (см. parse_columnar)
+            columns (tuple): столбцы csv-файла, которые нужны для создания вакансии
     """
+    columns = ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at')
+
     def __init__(self, folder_name, job):
         """Инициализирует объект DataSet
 
@@ -23,33 +30,57 @@ class DataSet:
         self.folder_name = folder_name
         self.file_name = 'csv/vacancies_dif_currencies.csv'
         self.vacancies_objects = []
+        self.columnar = None
         self.connector = InputConnect(self,job)
 
-    def create_vacancy(self, vac_dict, currency_dict):
+    def create_vacancy(self, vac_dict, rates):
         """Создает объект Vacancy
 
             Args:
                 vac_dict (dict): данные об одной вакансии
+                rates (CurrencyRates): курсы валют по месяцам
             Returns:
                 Vacancy: информация об одной вакансии в виде объекта Vacancy
         """
         salary = Salary(vac_dict['salary_from'], vac_dict['salary_to'],
                         vac_dict['salary_currency'], vac_dict['published_at'])
-        salary = salary.convert_to_rub(currency_dict)
+        salary = salary.convert_to_rub(rates)
 
         return Vacancy(vac_dict['name'], salary, vac_dict['area_name'],
                        int(vac_dict['published_at'][0:4]))
-    def parse_csv(self):
-        """Считывает данные из csv-файла и разбивает их на отдельные файлы по годам"""
-        data = reader.csv_reader(self.file_name)
-        all_rows = data['all_rows']
-        titles = data['titles']
+    def parse_csv(self, sample=None, offline=False, workers=1):
+        """Считывает данные из csv-файла и разбивает их на отдельные файлы по годам
+
+            Args:
+                sample (csv_reader.SampleSink): выборка вакансий для записи в csv-файл;
+                None - выборка не собирается
+                offline (bool): брать курсы валют только из локального хранилища
+                workers (int): количество потоков для выгрузки курсов валют
+        """
+        titles = reader.read_titles(self.file_name)
+        all_rows = reader.CsvRows(self.file_name, only_correct=False)
 
         currency = Currency(all_rows, titles.index('salary_currency'))
-        rows = currency.process_currencies(titles.index('published_at'))
+        rows = currency.process_currencies(titles.index('published_at'), offline, workers)
 
         #files_creator.parse_by_years(all_rows,titles)
-        self.vacancies_objects = reader.csv_filer(rows, titles, self.create_vacancy)
+        self.vacancies_objects = reader.csv_filer(rows, titles, self.create_vacancy, self.columns, sample)
+
+    def parse_columnar(self, offline=False, workers=1):
+        """Считывает данные из csv-файла сразу в столбцы numpy, не создавая объекты Vacancy:
+        оклады переводятся в рубли одной векторной операцией (см. columnar.ColumnarDataSet.from_rows)
+
+            Args:
+                offline (bool): брать курсы валют только из локального хранилища
+                workers (int): количество потоков для выгрузки курсов валют
+        """
+        import columnar
+        titles = reader.read_titles(self.file_name)
+        all_rows = reader.CsvRows(self.file_name, only_correct=False)
+
+        currency = Currency(all_rows, titles.index('salary_currency'))
+        rows = currency.process_currencies(titles.index('published_at'), offline, workers)
+        self.columnar = columnar.ColumnarDataSet.from_rows(rows, titles, Currency.get_rates())
 
 class Vacancy:
     """Класс для представления вакансии
@@ -59,7 +90,11 @@ class Vacancy:
                salary (Salary or float or int): зарплата
                area_name (str): место работы
                published_at (str or int): дата публикации
+               fields (tuple): названия свойств вакансии
         """
+    fields = ('name', 'salary', 'area_name', 'published_at')
+    __slots__ = fields
+
     def __init__(self, name, salary, area, published_at):
         """Инициализирует объект Vacancy
 
@@ -74,6 +109,14 @@ class Vacancy:
         self.area_name = area
         self.published_at = published_at
 
+    def get_values(self):
+        """Получает значения свойств вакансии в порядке fields
+
+            Returns:
+                list: значения свойств вакансии
+        """
+        return [getattr(self, field) for field in self.fields]
+
 class Salary:
     """Класс для представления зарплаты
 
@@ -81,7 +124,10 @@ class Salary:
             salary_from (str or int or float) : нижняя граница вилки оклада
             salary_to (str or int or float): верхняя граница вилки оклада
             salary_currency (str): валюта оклада
+            published_at (str): месяц публикации в формате ГГГГ-ММ
     """
+    __slots__ = ('salary_from', 'salary_to', 'salary_currency', 'published_at')
+
     def __init__(self, salary_from, salary_to, currency, published_at):
         """Инициализирует объект Salary
 
@@ -99,23 +145,25 @@ class Salary:
         self.salary_currency = currency
         self.published_at = published_at[0:7]
 
-    def convert_to_rub(self, currency_dict):
+    def convert_to_rub(self, rates):
         """Вычисляет среднюю зарплату из вилки и переводит в рубли при помощи
-        словаря currency_to_rub
+        таблицы курсов валют rates
 
+            Args:
+                rates (CurrencyRates): курсы валют по месяцам
             Returns:
                 float: средняя зарплата в рублях
         >>> salary = Salary(10,20,'USD','2003-01')
-        >>> salary.convert_to_rub(Currency.get_currency_data())
+        >>> salary.convert_to_rub(Currency.get_rates())
         477.02250000000004
         >>> salary = Salary('','','RUR','2003-01')
-        >>> salary.convert_to_rub(Currency.get_currency_data())
+        >>> salary.convert_to_rub(Currency.get_rates())
         ''
         >>> salary = Salary('',40.2,'RUR','2003-01')
-        >>> salary.convert_to_rub(Currency.get_currency_data())
+        >>> salary.convert_to_rub(Currency.get_rates())
         40.2
         >>> salary = Salary(10.3,40.2,'РУБ','2003-01')
-        >>> salary.convert_to_rub(Currency.get_currency_data())
+        >>> salary.convert_to_rub(Currency.get_rates())
         ''
         """
         if self.salary_from == '' and self.salary_to == '':
@@ -123,12 +171,319 @@ class Salary:
         average_salary = (float(self.salary_to) + float(self.salary_from)) / 2
         if self.salary_currency == 'RUR':
             return average_salary
-        if self.salary_currency not in currency_dict[self.published_at].keys():
+        currency = rates.get_rate(self.published_at, self.salary_currency)
+        if currency is None:
             return ''
-        currency = currency_dict[self.published_at][self.salary_currency]
-        if currency == ' ':
-            return ''
-        return average_salary * float(currency)
+        return average_salary * currency
+
+def get_statistics_by_year(file_path, job, rates):
+    """Получает накопленную статистику по одному файлу с данными за год.
+    Если рядом с файлом есть актуальная двоичная партиция (папка с тем же именем,
+    манифест которой совпадает с файлом), данные берутся из нее без разбора csv.
+    Функция выполняется в дочернем процессе
+
+        Args:
+            file_path (str): путь к файлу с данными за год
+            job (str): название профессии, по которой нужно получить статистику
+            rates (CurrencyRates): курсы валют по месяцам
+        Returns:
+            StatisticsAccumulator: накопленная статистика за год
+    """
+    partition = os.path.splitext(file_path)[0]
+    if files_creator.is_partition_current(file_path, partition):
+        import columnar
+        return columnar.ColumnarDataSet.from_partition(partition, rates).aggregate(job)
+
+    data_set = DataSet(os.path.dirname(file_path), job)
+    titles = reader.read_titles(file_path)
+    rows = reader.iter_rows(file_path, only_correct=False)
+    accumulator = StatisticsAccumulator(job)
+    vacancies = reader.iter_vacancies(rows, titles, data_set.create_vacancy, rates, data_set.columns)
+    for vacancy, vac_dict in vacancies:
+        if vacancy.salary != '':
+            accumulator.add(vacancy)
+    return accumulator
+
+class StatisticsAccumulator:
+    """Класс для накопления статистики по годам и городам за один проход по вакансиям
+
+        Attributes:
+            job (str): название профессии, по которой нужно получить статистику
+            years (dict): год -> [количество вакансий, сумма зарплат,
+                количество вакансий по профессии, сумма зарплат по профессии]
+            cities (dict): город -> [количество вакансий, сумма зарплат]
+                (в порядке первого появления города)
+    """
+    def __init__(self, job):
+        """Инициализирует объект StatisticsAccumulator
+
+            Args:
+                job (str): название профессии, по которой нужно получить статистику
+        """
+        self.job = job
+        self.years = {}
+        self.cities = {}
+
+    def add(self, vacancy, weight=1):
+        """Учитывает одну вакансию в статистике
+
+            Args:
+                vacancy (Vacancy): вакансия
+                weight (int or float): вес вакансии (количество вакансий, которые она представляет)
+        """
+        salary = float(vacancy.salary) * weight
+        year = self.years.get(vacancy.published_at)
+        if year is None:
+            year = self.years[vacancy.published_at] = [0, 0, 0, 0]
+        year[0] += weight
+        year[1] += salary
+        if self.job in vacancy.name:
+            year[2] += weight
+            year[3] += salary
+
+        city = self.cities.get(vacancy.area_name)
+        if city is None:
+            city = self.cities[vacancy.area_name] = [0, 0]
+        city[0] += weight
+        city[1] += salary
+
+    def add_all(self, vacancies):
+        """Учитывает в статистике все вакансии из списка или генератора
+
+            Args:
+                vacancies (iterable): вакансии
+            Returns:
+                StatisticsAccumulator: текущий объект
+        """
+        for vacancy in vacancies:
+            self.add(vacancy)
+        return self
+
+    def merge(self, other):
+        """Добавляет к текущей статистике статистику, накопленную другим объектом
+
+            Args:
+                other (StatisticsAccumulator): накопленная статистика
+            Returns:
+                StatisticsAccumulator: текущий объект
+        """
+        for age, values in other.years.items():
+            year = self.years.setdefault(age, [0, 0, 0, 0])
+            for i in range(4):
+                year[i] += values[i]
+        for name, values in other.cities.items():
+            city = self.cities.setdefault(name, [0, 0])
+            city[0] += values[0]
+            city[1] += values[1]
+        return self
+
+    def merge_all(self, accumulators):
+        """Добавляет к текущей статистике статистику из нескольких объектов
+
+            Args:
+                accumulators (iterable): объекты StatisticsAccumulator
+            Returns:
+                StatisticsAccumulator: текущий объект
+        """
+        for accumulator in accumulators:
+            self.merge(accumulator)
+        return self
+
+    def get_average(self, count, salaries_sum):
+        """Получает среднюю зарплату
+
+            Args:
+                count (int): количество вакансий
+                salaries_sum (float): сумма зарплат
+            Returns:
+                int: средняя зарплата (0, если вакансий нет)
+        """
+        if count == 0:
+            return 0
+        return int(salaries_sum // count)
+
+    def get_years_statistics(self):
+        """Получает статистику по годам
+
+            Returns:
+                dict: уровень зарплат по годам для всех вакансий и для выбранной профессии,
+                количество вакансий по годам для всех вакансий и для выбранной профессии
+        """
+        ages = sorted(self.years.keys())
+        return {'salary_all': {age: self.get_average(*self.years[age][0:2]) for age in ages},
+                'number_all': {age: round(self.years[age][0]) for age in ages},
+                'salary_job': {age: self.get_average(*self.years[age][2:4]) for age in ages},
+                'number_job': {age: round(self.years[age][2]) for age in ages}}
+
+    def get_cities_statistics(self):
+        """Получает несортированную статистику по городам, в которых опубликовано
+        не менее 1% вакансий
+
+            Returns:
+                tuple: (уровень зарплат в городах, доля вакансий по городам)
+        """
+        total_count = sum(city[0] for city in self.cities.values())
+        min_count = math.floor(total_count * 0.01)
+        salary_level = {}
+        vac_proportion = {}
+        for name, (count, salaries_sum) in self.cities.items():
+            if count >= min_count:
+                salary_level[name] = self.get_average(count, salaries_sum)
+                vac_proportion[name] = round(count / total_count, 4)
+        return salary_level, vac_proportion
+
+class ApproximateStatistics:
+    """Класс для приближенной статистики по выборке, стратифицированной по годам:
+    для каждого года хранится резервуарная выборка строк фиксированного размера.
+    Очистка строк и перевод окладов в рубли выполняются только для строк выборки
+
+        Attributes:
+            job (str): название профессии, по которой нужно получить статистику
+            sample_size (int): размер выборки для каждого года
+            seed (int): начальное значение генератора случайных чисел
+            z (float): квантиль нормального распределения для доверительных интервалов
+            strata (dict): год -> csv_reader.SampleSink со строками выборки
+            accumulator (StatisticsAccumulator): взвешенные оценки сумм и количеств
+            intervals (dict): полуширины доверительных интервалов средних зарплат
+                ('salary_all', 'salary_job' - по годам, 'salary_cities' - по городам)
+    """
+    def __init__(self, job, sample_size=1000, seed=None, z=1.96):
+        """Инициализирует объект ApproximateStatistics
+
+            Args:
+                job (str): название профессии, по которой нужно получить статистику
+                sample_size (int): размер выборки для каждого года
+                seed (int): начальное значение генератора случайных чисел
+                z (float): квантиль нормального распределения (1.96 - интервал 95%)
+        """
+        self.job = job
+        self.sample_size = sample_size
+        self.seed = seed
+        self.z = z
+        self.strata = {}
+        self.accumulator = StatisticsAccumulator(job)
+        self.intervals = {'salary_all': {}, 'salary_job': {}, 'salary_cities': {}}
+
+    def add_rows(self, rows, titles):
+        """Распределяет строки csv-файла по выборкам соответствующих годов
+
+            Args:
+                rows (iterable): строки, считанные из файла
+                titles (list): заголовки столбцов
+            Returns:
+                ApproximateStatistics: текущий объект
+        """
+        date_index = titles.index('published_at')
+        for row in rows:
+            year = int(row[date_index][0:4])
+            stratum = self.strata.get(year)
+            if stratum is None:
+                seed = None if self.seed is None else f"{self.seed}-{year}"
+                stratum = self.strata[year] = reader.SampleSink(self.sample_size, 'reservoir', seed=seed)
+            stratum.add(row)
+        return self
+
+    def get_interval(self, salaries):
+        """Получает полуширину доверительного интервала среднего по простой выборке
+
+            Args:
+                salaries (list): зарплаты
+            Returns:
+                float: полуширина интервала (0, если значений меньше двух)
+        """
+        count = len(salaries)
+        if count < 2:
+            return 0.0
+        mean = sum(salaries) / count
+        variance = sum((salary - mean) ** 2 for salary in salaries) / (count - 1)
+        return self.z * math.sqrt(variance / count)
+
+    def get_weighted_interval(self, values):
+        """Получает полуширину доверительного интервала взвешенного среднего
+        (линеаризованная оценка дисперсии)
+
+            Args:
+                values (list): пары (вес, зарплата)
+            Returns:
+                float: полуширина интервала
+        """
+        total = sum(weight for weight, salary in values)
+        mean = sum(weight * salary for weight, salary in values) / total
+        variance = sum((weight * (salary - mean)) ** 2 for weight, salary in values)
+        return self.z * math.sqrt(variance) / total
+
+    def estimate(self, titles, create_vacancy, rates, columns=None):
+        """Вычисляет оценки статистики и доверительные интервалы по выборкам.
+        Вакансия из выборки года представляет (строк за год / размер выборки) вакансий
+
+            Args:
+                titles (list): заголовки столбцов
+                create_vacancy (function): функция, создающая объект Vacancy
+                rates (CurrencyRates): курсы валют по месяцам
+                columns (iterable): названия нужных столбцов; None - все столбцы
+            Returns:
+                StatisticsAccumulator: взвешенные оценки сумм и количеств
+        """
+        cities = {}
+        for year in sorted(self.strata):
+            stratum = self.strata[year]
+            weight = stratum.count / len(stratum.rows)
+            correction = math.sqrt(1 - len(stratum.rows) / stratum.count)
+            vacancies = [vacancy for vacancy, vac_dict in
+                         reader.iter_vacancies(stratum.rows, titles, create_vacancy, rates, columns)
+                         if vacancy.salary != '']
+            salaries = [float(vacancy.salary) for vacancy in vacancies]
+            job_salaries = [float(vacancy.salary) for vacancy in vacancies if self.job in vacancy.name]
+            self.intervals['salary_all'][year] = self.get_interval(salaries) * correction
+            self.intervals['salary_job'][year] = self.get_interval(job_salaries) * correction
+            for vacancy in vacancies:
+                self.accumulator.add(vacancy, weight)
+                cities.setdefault(vacancy.area_name, []).append((weight, float(vacancy.salary)))
+
+        for city, values in cities.items():
+            self.intervals['salary_cities'][city] = self.get_weighted_interval(values)
+        return self.accumulator
+
+    def get_error_report(self, exact):
+        """Сравнивает оценки средних зарплат с точной статистикой
+
+            Args:
+                exact (StatisticsAccumulator): точная статистика
+            Returns:
+                list: строки отчета [показатель, год или город, точное значение,
+                оценка, полуширина интервала, относительная ошибка, попадает ли точное значение в интервал]
+        """
+        report = []
+        exact_years = exact.get_years_statistics()
+        approximate_years = self.accumulator.get_years_statistics()
+        for metric in ('salary_all', 'salary_job'):
+            for year, value in exact_years[metric].items():
+                estimate = approximate_years[metric].get(year, 0)
+                report.append(self.get_error_row(metric, year, value, estimate,
+                                                 self.intervals[metric].get(year, 0.0)))
+
+        for city, value in exact.get_cities_statistics()[0].items():
+            estimate = self.accumulator.get_average(*self.accumulator.cities.get(city, [0, 0]))
+            report.append(self.get_error_row('salary_cities', city, value, estimate,
+                                             self.intervals['salary_cities'].get(city, 0.0)))
+        return report
+
+    def get_error_row(self, metric, key, value, estimate, interval):
+        """Формирует строку отчета об ошибке оценки
+
+            Args:
+                metric (str): показатель
+                key (int or str): год или город
+                value (int): точное значение
+                estimate (int): оценка
+                interval (float): полуширина доверительного интервала
+            Returns:
+                list: строка отчета
+        """
+        error = abs(estimate - value) / value if value else 0.0
+        return [metric, key, value, estimate, round(interval), round(error, 4),
+                abs(estimate - value) <= interval]
+
 class InputConnect:
     """Класс для формирования статистики по вакансиям
 
@@ -146,71 +501,67 @@ class InputConnect:
         self.data_set = data_set
         self.job = job
 
-    '''def get_salary_by_age(self, vacancies):
-        """Получает среднюю зарплату в заданный год
+    def run_multiprocessing(self, workers=None):
+        """Получает статистику по файлам с данными по годам, обрабатывая каждый файл
+        в отдельном процессе. Процессы возвращают только накопленные суммы и количества,
+        которые затем объединяются в основном процессе
 
-           Args:
-               vacancies (list): список вакансий
+            Args:
+                workers (int): количество процессов (по умолчанию - количество ядер)
             Returns:
-                int: средняя зарплата в заданный год
+                tuple: (статистика по годам, статистика по городам)
         """
-        if len(vacancies) == 0:
-            return 0
-        sum_salaries = sum([float(vac.salary) for vac in vacancies])
-        return int(sum_salaries // len(vacancies))
-
-    def join_statistics_by_years(self, data_dict):
-        """Объединяет данные статистики по годам
+        folder = self.data_set.folder_name
+        files = [f"{folder}/{name}" for name in sorted(os.listdir(folder)) if name.endswith('.csv')]
+        task = partial(get_statistics_by_year, job=self.job,
+                       rates=Currency.get_rates())
+
+        if workers == 1:
+            partials = map(task, files)
+            return self.collect_statistics(StatisticsAccumulator(self.job).merge_all(partials))
+        with Pool(processes=workers) as pool:
+            partials = pool.imap(task, files)
+            return self.collect_statistics(StatisticsAccumulator(self.job).merge_all(partials))
+
+    def get_approximate_statistics(self, sample_size=1000, seed=None, compare=False):
+        """Получает приближенную статистику по выборкам строк файлов с данными по годам
+        и печатает доверительные интервалы средних зарплат. При compare=True дополнительно
+        вычисляет точную статистику и печатает отчет об ошибках оценки
 
             Args:
-                data_dict (dict) : словарь с данными статистики
+                sample_size (int): размер выборки для каждого года
+                seed (int): начальное значение генератора случайных чисел
+                compare (bool): сравнить оценки с точной статистикой
             Returns:
-                dict: уровень зарплат по годам для всех вакансий и для выбранной профессии,
-                количество вакансий по годам для всех вакансий и для выбранной профессии
+                ApproximateStatistics: приближенная статистика
         """
-        sorted(data_dict.items())
-        salary_all = {}
-        number_all = {}
-        salary_job = {}
-        number_job = {}
-        for item in data_dict.items():
-            salary_all[item[0]] = item[1]['salary_all']
-            number_all[item[0]] = item[1]['number_all']
-            salary_job[item[0]] = item[1]['salary_job']
-            number_job [item[0]] = item[1]['number_job']
-
-        return {'salary_all': salary_all,
-                'number_all': number_all,
-                'salary_job': salary_job,
-                'number_job': number_job}
-
-    def get_statistics_by_year(self, year):
-        """Получает количество вакансий и уровень зарплат для всех вакансий
-        и для выбранной профессии за один год
-            Args:
-                year (string) : год
-            Returns:
-                dict: количество вакансий и уровень зарплат для всех вакансий
-        и для выбранной профессии за один год
-        """
-        file_path = f"{self.data_set.folder_name}/{year}.csv"
-        rows, titles = reader.csv_reader(file_path)
-        vac_list = reader.csv_filer(rows, titles, self.data_set.create_vacancy)
-        job_list = list(filter(lambda vac: self.job in vac.name, vac_list))
-        return {'year': year,
-                'salary_all': self.get_salary_by_age(vac_list),
-                'number_all': len(vac_list),
-                'salary_job': self.get_salary_by_age(job_list),
-                'number_job': len(job_list), }
-
-    def run_multiprocessing(self):
-        """Запускает обработку данных по годам, используя параллельные процессы"""
-        years = [str(year) for year in range(2003, 2023)]
-
-        pool = Pool(processes=1)
-        stats_list = pool.map(self.get_statistics_by_year, years)
-        res = {v['year']: v for v in stats_list}
-        return self.join_statistics_by_years(res)'''
+        folder = self.data_set.folder_name
+        files = [f"{folder}/{name}" for name in sorted(os.listdir(folder)) if name.endswith('.csv')]
+        approximate = ApproximateStatistics(self.job, sample_size, seed)
+        titles = []
+        for file_path in files:
+            titles = reader.read_titles(file_path)
+            approximate.add_rows(reader.iter_rows(file_path, only_correct=False), titles)
+
+        rates = Currency.get_rates()
+        accumulator = approximate.estimate(titles, self.data_set.create_vacancy, rates, self.data_set.columns)
+        self.collect_statistics(accumulator)
+        intervals = {metric: {key: round(value) for key, value in values.items()}
+                     for metric, values in approximate.intervals.items()}
+        print(f"Доверительные интервалы уровня зарплат по годам (±): {intervals['salary_all']}")
+        print(f"Доверительные интервалы уровня зарплат по годам для выбранной профессии (±): "
+              f"{intervals['salary_job']}")
+        salary_cities = self.sort_cities_statistics(accumulator)[0]
+        cities_intervals = {city: intervals['salary_cities'][city] for city in salary_cities}
+        print(f"Доверительные интервалы уровня зарплат по городам (±): {cities_intervals}")
+
+        if compare:
+            exact = StatisticsAccumulator(self.job).merge_all(
+                get_statistics_by_year(file_path, self.job, rates) for file_path in files)
+            print('Показатель', 'Год/город', 'Точно', 'Оценка', '±', 'Ошибка', 'В интервале', sep='\t')
+            for row in approximate.get_error_report(exact):
+                print(*row, sep='\t')
+        return approximate
 
     def get_all_ages(self, list_objects):
         """Получает список неповторяющихся дат, в которые были опубликованы все вакансии
@@ -329,22 +680,18 @@ class InputConnect:
            Returns:
                tuple: (статистика по уровню зарплат в городах, доля вакансий по городам)
         """
-        total_count = len(vac_objects)
-        min_count = math.floor(total_count * 0.01)
-        vac_cities = self.count_vacancies_by_cities(vac_objects)
+        accumulator = StatisticsAccumulator(self.job).add_all(vac_objects)
+        return self.sort_cities_statistics(accumulator)
 
-        salary_level = {}
-        vac_proportion = {city: round(n / total_count, 4) for city, n in vac_cities.items()
-                          if n >= min_count}
-        for city in vac_cities.items():
-            if city[1] >= min_count:
-                vacancies = list(filter(lambda vac: vac.area_name == city[0], vac_objects))
-                if len(vacancies) == 0:
-                    salary_level[city[0]] = 0
-                else:
-                    sum_salaries = sum([float(vac.salary) for vac in vacancies])
-                    salary_level[city[0]] = int(sum_salaries // len(vacancies))
+    def sort_cities_statistics(self, accumulator):
+        """Получает первые 10 значений статистики по городам в порядке убывания
 
+           Args:
+               accumulator (StatisticsAccumulator): накопленная статистика
+           Returns:
+               tuple: (статистика по уровню зарплат в городах, доля вакансий по городам)
+        """
+        salary_level, vac_proportion = accumulator.get_cities_statistics()
         salary_level = self.sort_cities(salary_level, 10)
         vac_proportion = self.sort_cities(vac_proportion, 10)
         return salary_level, vac_proportion
@@ -363,25 +710,38 @@ class InputConnect:
         print(f"Уровень зарплат по городам (в порядке убывания): {cities['salary']}")
         print(f"Доля вакансий по городам (в порядке убывания): {cities['proportion']}")
 
-    def get_statistics(self):
+    def get_statistics(self, backend='objects'):
         """Получает статистические данные по вакансиям и для выбранной профессии
 
+            Args:
+                backend (str): способ вычисления: 'objects' - проход по объектам Vacancy,
+                'columnar' - векторные группировки по столбцам numpy. Для 'columnar'
+                используются столбцы, считанные DataSet.parse_columnar; если их нет,
+                столбцы строятся из объектов Vacancy
             Returns:
                 tuple: (статистика по годам, статистика по городам)
         """
         vac_objects = self.data_set.vacancies_objects
-        job_objects = list(filter(lambda vac: self.job in vac.name, vac_objects))
-        ages = self.get_all_ages(vac_objects)
-        ages.sort()
-
-        number_all, number_job = self.count_vacancies_by_ages(ages, vac_objects, job_objects)
-        salary_all, salary_job = self.get_salary_by_ages(ages, vac_objects, job_objects)
-        salary_cities, proportion_cities = self.get_statistics_by_cities(vac_objects)
+        if backend == 'columnar':
+            import columnar
+            data = self.data_set.columnar
+            if data is None:
+                data = columnar.ColumnarDataSet.from_vacancies(vac_objects)
+            accumulator = data.aggregate(self.job)
+        else:
+            accumulator = StatisticsAccumulator(self.job).add_all(vac_objects)
+        return self.collect_statistics(accumulator)
+
+    def collect_statistics(self, accumulator):
+        """Формирует и печатает итоговые данные статистики из накопленных значений
 
-        years_statistics = {'salary_all': salary_all,
-                            'number_all': number_all,
-                            'salary_job': salary_job,
-                            'number_job': number_job}
+            Args:
+                accumulator (StatisticsAccumulator): накопленная статистика
+            Returns:
+                tuple: (статистика по годам, статистика по городам)
+        """
+        years_statistics = accumulator.get_years_statistics()
+        salary_cities, proportion_cities = self.sort_cities_statistics(accumulator)
 
         cities_statistics = {'salary': salary_cities,
                              'proportion': proportion_cities}
@@ -389,3 +749,37 @@ class InputConnect:
         self.print_statistics(years_statistics, cities_statistics)
         return years_statistics, cities_statistics
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Статистика по вакансиям из файлов с данными по годам')
+    parser.add_argument('folder', help='папка с файлами <год>.csv')
+    parser.add_argument('job', help='название профессии')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='количество процессов (по умолчанию - количество ядер)')
+    parser.add_argument('--approximate', type=int, default=None, metavar='SAMPLE_SIZE',
+                        help='приближенная статистика по выборке заданного размера для каждого года')
+    parser.add_argument('--seed', type=int, default=None, help='начальное значение для выборки')
+    parser.add_argument('--compare', action='store_true',
+                        help='сравнить приближенную статистику с точной')
+    parser.add_argument('--csv', default=None, metavar='FILE_NAME',
+                        help='посчитать статистику по общему файлу выгрузки вместо файлов по годам')
+    parser.add_argument('--offline', action='store_true',
+                        help='брать курсы валют только из локального хранилища (для --csv)')
+    parser.add_argument('--currency-workers', type=int, default=1,
+                        help='количество потоков для выгрузки курсов валют (для --csv)')
+    parser.add_argument('--backend', choices=('objects', 'columnar'), default='objects',
+                        help='способ вычисления статистики по общему файлу: объекты Vacancy '
+                             'или столбцы numpy (для --csv)')
+    args = parser.parse_args()
+    data_set = DataSet(args.folder, args.job)
+    connector = data_set.connector
+    if args.csv is not None:
+        data_set.file_name = args.csv
+        if args.backend == 'columnar':
+            data_set.parse_columnar(offline=args.offline, workers=args.currency_workers)
+        else:
+            data_set.parse_csv(offline=args.offline, workers=args.currency_workers)
+        connector.get_statistics(args.backend)
+    elif args.approximate is not None:
+        connector.get_approximate_statistics(args.approximate, args.seed, args.compare)
+    else:
+        connector.run_multiprocessing(args.workers)
@@ -1,7 +1,10 @@
 import re
 import os
 import math
+import heapq
+from itertools import islice
 import datetime
+import numpy as np
 import prettytable
 from prettytable import PrettyTable
 import csv_reader as reader
@@ -14,6 +17,8 @@ class DataSet:
         file_name (str): имя файла, из которого считываются данные
         vacancies_objects (list): список вакансий
         connector (InputConnect): объект, отвечающий за формирование данных статистики
+        loaded (tuple): (размер и время изменения файла, загруженные столбцы) -
+            состояние последней загрузки (см. load_vacancies)
 
     """
     def __init__(self, file_name):
@@ -24,61 +29,80 @@ class DataSet:
         """
         self.file_name = file_name
         self.vacancies_objects = []
+        self.loaded = None
         self.connector = InputConnect(self)
 
-    def create_vacancy(self, vacancy_dict):
-        """Создает объект Vacancy
+    def create_vacancy(self, vacancy_dict, rates=None):
+        """Создает объект Vacancy. Свойства, столбцов которых нет
+        в vacancy_dict (см. InputConnect.get_columns), равны None
 
            Args:
                vacancy_dict (dict): данные об одной вакансии
+               rates (CurrencyRates): курсы валют (не используются, оклад переводится
+               по словарю Salary.currency_to_rub)
            Returns:
                Vacancy: информация о вакансии в виде объекта Vacancy
         """
-        name = vacancy_dict['name']
-        experience = vacancy_dict['experience_id']
-        description = vacancy_dict['description']
-        area = vacancy_dict['area_name']
-        employer = vacancy_dict['employer_name']
-        skills = vacancy_dict['key_skills']
-        premium = vacancy_dict['premium']
-        published_at = vacancy_dict['published_at']
-
-        salary = Salary(vacancy_dict['salary_from'], vacancy_dict['salary_to'],
-                        vacancy_dict['salary_gross'], vacancy_dict['salary_currency'])
+        name = vacancy_dict.get('name')
+        experience = vacancy_dict.get('experience_id')
+        description = vacancy_dict.get('description')
+        area = vacancy_dict.get('area_name')
+        employer = vacancy_dict.get('employer_name')
+        skills = vacancy_dict.get('key_skills')
+        premium = vacancy_dict.get('premium')
+        published_at = vacancy_dict.get('published_at')
+
+        salary = None
+        if 'salary_from' in vacancy_dict:
+            salary = Salary(vacancy_dict['salary_from'], vacancy_dict['salary_to'],
+                            vacancy_dict['salary_gross'], vacancy_dict['salary_currency'])
 
         vacancy = Vacancy(name, description, skills, experience,
                           premium, employer, salary, area, published_at)
         return vacancy
 
+    def load_vacancies(self, columns=None):
+        """Загружает вакансии из csv-файла. Если файл не изменился и уже загружены
+        все нужные столбцы, загруженные вакансии (а с ними индексы и ключи сортировки
+        InputConnect) используются повторно
+
+           Args:
+               columns (set): названия нужных столбцов; None - все столбцы
+        """
+        stat = os.stat(self.file_name)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self.loaded is not None and self.loaded[0] == signature:
+            loaded_columns = self.loaded[1]
+            if loaded_columns is None or (columns is not None and columns <= loaded_columns):
+                return
+
+        titles = reader.read_titles(self.file_name)
+        rows = reader.iter_rows(self.file_name)
+        self.vacancies_objects = reader.csv_filer(rows, titles, self.create_vacancy, columns)
+        self.connector.reset_sort_keys()
+        self.loaded = (signature, columns)
+
     def parse_csv(self, input_data):
-        """Считывает данные из csv-файла,
-        форматирует, сортирует и фильтрует полученные данные
+        """Считывает данные из csv-файла, выполняет запрос с условиями фильтрации,
+        сортировкой и диапазоном строк и печатает результат. Форматируются
+        только строки, попадающие в выводимый диапазон
 
            Args:
                input_data (dict): параметры фильтрации и сортировки
         """
-        data = reader.csv_reader(self.file_name)
-        rows = data['rows']
-        titles = data['titles']
-        self.vacancies_objects = reader.csv_filer(rows, titles, self.create_vacancy)
+        self.load_vacancies(self.connector.get_columns(input_data))
         if len(self.vacancies_objects) == 0:
             print('Нет данных')
             return
 
-        if input_data['filter'][0] != '':
-            self.vacancies_objects = self.connector.filter_data(
-                input_data['filter'][0], input_data['filter'][1])
-            if len(self.vacancies_objects) == 0:
-                print('Ничего не найдено')
-        if len(self.vacancies_objects) != 0:
-            if input_data['sort_param'] != '':
-                sort_param = self.connector.eng_naming[input_data['sort_param']]
-                is_reversed = (input_data['reversed'] == 'Да')
-                sorting_func = self.connector.get_sorting_func(sort_param)
-                self.vacancies_objects.sort(key=sorting_func, reverse=is_reversed)
-
-            table = self.connector.create_table(self.vacancies_objects, self.connector.rus_naming)
-            self.connector.print_table(table, input_data['range'], input_data['columns'])
+        count, vacancies = self.connector.run_query(self.connector.get_query(input_data))
+        if count == 0:
+            print('Ничего не найдено')
+            return
+        start, end = self.connector.get_rows_range(input_data['range'], count)
+        table = self.connector.create_table(islice(vacancies, start, end), self.connector.rus_naming, start + 1,
+                                            self.connector.get_shown_fields(input_data['columns']))
+        self.connector.print_table(table, [''], input_data['columns'])
 
 class Vacancy:
     """Класс для представления вакансии
@@ -93,7 +117,12 @@ class Vacancy:
            salary (Salary): зарплата
            area_name (str): место работы
            published_at (str): дата публикации
+           fields (tuple): названия свойств вакансии в порядке столбцов таблицы
     """
+    fields = ('name', 'description', 'key_skills', 'experience_id', 'premium',
+              'employer_name', 'salary', 'area_name', 'published_at')
+    __slots__ = fields
+
     def __init__(self, name, description, skills, experience,
                  premium, employer, salary, area, published_at):
         """Инициализирует объект Vacancy
@@ -119,6 +148,14 @@ class Vacancy:
         self.area_name = area
         self.published_at = published_at
 
+    def get_values(self):
+        """Получает значения свойств вакансии в порядке fields
+
+           Returns:
+               list: значения свойств вакансии
+        """
+        return [getattr(self, field) for field in self.fields]
+
 class Salary:
     """Класс для представления зарплаты
 
@@ -128,6 +165,8 @@ class Salary:
            salary_gross (str or bool): указан ли оклад с вычетом налогов
            salary_currency (str): валюта оклада
     """
+    __slots__ = ('salary_from', 'salary_to', 'salary_gross', 'salary_currency')
+
     def __init__(self, salary_from, salary_to, gross, currency):
         """Инициализирует объект Salary
 
@@ -169,11 +208,128 @@ class Salary:
         average_salary = (float(self.salary_to) + float(self.salary_from)) // 2
         return average_salary * self.currency_to_rub[self.salary_currency]
 
+class VacancyQuery:
+    """Класс для представления запроса к вакансиям
+
+       Attributes:
+           predicates (list): условия фильтрации - пары (свойство, значение)
+           mode (str): способ объединения условий: 'and' (И) или 'or' (ИЛИ)
+           sort_params (list): пары (параметр сортировки, нужно ли сортировать по убыванию)
+           limit (int): количество первых строк результата; None - все строки
+    """
+    def __init__(self, predicates=(), mode='and', sort_params=(), limit=None):
+        """Инициализирует объект VacancyQuery
+
+           Args:
+               predicates (iterable): условия фильтрации - пары (свойство, значение)
+               mode (str): способ объединения условий: 'and' (И) или 'or' (ИЛИ)
+               sort_params (iterable): пары (параметр сортировки, нужно ли сортировать по убыванию)
+               limit (int): количество первых строк результата; None - все строки
+        """
+        self.predicates = list(predicates)
+        self.mode = mode
+        self.sort_params = list(sort_params)
+        self.limit = limit
+
+class SalaryIntervalIndex:
+    """Класс для поиска вакансий по вилке оклада: центрированное дерево интервалов
+    над границами вилок. В каждом узле хранятся интервалы, содержащие центр узла,
+    отсортированные по нижней и по верхней границе. Вилки с нижней границей больше
+    верхней не содержат ни одного значения и в индекс не попадают
+
+       Attributes:
+           starts (numpy.ndarray): нижние границы вилок
+           ends (numpy.ndarray): верхние границы вилок
+           by_start (numpy.ndarray): номера вакансий с непустой вилкой в порядке возрастания нижней границы
+           sorted_starts (numpy.ndarray): нижние границы в порядке возрастания
+           root (list): корень дерева [центр, номера по нижней границе, нижние границы,
+               номера по верхней границе, верхние границы, левое поддерево, правое поддерево]
+    """
+    def __init__(self, starts, ends):
+        """Инициализирует объект SalaryIntervalIndex
+
+           Args:
+               starts (list): нижние границы вилок
+               ends (list): верхние границы вилок
+        """
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        valid = np.flatnonzero(self.starts <= self.ends)
+        self.by_start = valid[np.argsort(self.starts[valid], kind='stable')]
+        self.sorted_starts = self.starts[self.by_start]
+        self.root = self.build(valid)
+
+    def build(self, positions):
+        """Строит поддерево для заданных интервалов. Центр узла - медиана их границ,
+        поэтому по каждую сторону от него оказывается не больше половины границ
+        и глубина дерева логарифмическая; сам узел может не содержать интервалов
+
+           Args:
+               positions (numpy.ndarray): номера интервалов
+           Returns:
+               list: узел дерева (None для пустого набора интервалов)
+        """
+        if len(positions) == 0:
+            return None
+        starts = self.starts[positions]
+        ends = self.ends[positions]
+        center = np.median(np.concatenate([starts, ends]))
+        is_left = ends < center
+        is_right = starts > center
+        here = positions[~(is_left | is_right)]
+        by_start = here[np.argsort(self.starts[here], kind='stable')]
+        by_end = here[np.argsort(self.ends[here], kind='stable')]
+        return [center, by_start, self.starts[by_start], by_end, self.ends[by_end],
+                self.build(positions[is_left]), self.build(positions[is_right])]
+
+    def stab(self, value):
+        """Находит интервалы, содержащие значение (границы включаются)
+
+           Args:
+               value (float): значение оклада
+           Returns:
+               numpy.ndarray: номера интервалов по возрастанию
+        """
+        found = []
+        node = self.root
+        while node is not None:
+            center, by_start, starts, by_end, ends, left, right = node
+            if value < center:
+                found.append(by_start[:np.searchsorted(starts, value, 'right')])
+                node = left
+            elif value > center:
+                found.append(by_end[np.searchsorted(ends, value, 'left'):])
+                node = right
+            else:
+                found.append(by_start)
+                break
+        return np.sort(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+
+    def overlap(self, low, high):
+        """Находит интервалы, пересекающиеся с отрезком [low, high]: интервалы,
+        содержащие low, и интервалы, нижняя граница которых лежит в (low, high].
+        Если low > high, отрезок пуст и результат тоже пуст
+
+           Args:
+               low (float): нижняя граница отрезка
+               high (float): верхняя граница отрезка
+           Returns:
+               numpy.ndarray: номера интервалов по возрастанию
+        """
+        if low > high:
+            return np.array([], dtype=np.int64)
+        first = np.searchsorted(self.sorted_starts, low, 'right')
+        last = np.searchsorted(self.sorted_starts, high, 'right')
+        return np.sort(np.concatenate([self.stab(low), self.by_start[first:last]]))
+
 class InputConnect:
     """Класс для фильтрации, сортировки данных и представления данных в виде таблицы
 
        Attributes:
            data_set (DataSet): набор данных по вакансиям
+           sort_keys (dict): параметр сортировки -> {вакансия: ключ сортировки}
+           indexes (dict): свойство -> инвертированный индекс (см. get_index)
+           indexed_vacancies (list): список вакансий, по которому построены индексы
     """
     def __init__(self, data_set):
         """Инициализирует объект InputConnect
@@ -182,6 +338,9 @@ class InputConnect:
                data_set (DataSet): набор данных по вакансиям
         """
         self.data_set = data_set
+        self.sort_keys = {}
+        self.indexes = {}
+        self.indexed_vacancies = None
 
     rus_naming = {
         'name': 'Название', 'description': 'Описание',
@@ -277,7 +436,58 @@ class InputConnect:
 
         if param in sorting_methods.keys():
             return sorting_methods[param]
-        return lambda vac: vac.__dict__[param]
+        return lambda vac: getattr(vac, param)
+
+    def get_sort_keys(self, vacancies, param):
+        """Получает типизированные ключи сортировки для списка вакансий: оклад в рублях,
+        время публикации в секундах, приоритет опыта работы, количество навыков.
+        Ключ каждой вакансии вычисляется один раз и сохраняется в sort_keys
+        для повторных сортировок (сохраненные ключи сбрасывает reset_sort_keys)
+
+           Args:
+               vacancies (list): список вакансий
+               param (str): параметр сортировки
+           Returns:
+               list: ключи сортировки в порядке списка вакансий
+        """
+        column = self.sort_keys.setdefault(param, {})
+        missing = [vac for vac in vacancies if vac not in column]
+        if param == 'published_at' and missing:
+            dates = dt_converter.convert_to_dates([vac.published_at for vac in missing])
+            column.update(zip(missing, dates.astype('int64').tolist()))
+        elif missing:
+            sorting_func = self.get_sorting_func(param)
+            column.update((vac, sorting_func(vac)) for vac in missing)
+        return [column[vac] for vac in vacancies]
+
+    def reset_sort_keys(self):
+        """Удаляет сохраненные ключи сортировки (например, после загрузки новых данных)"""
+        self.sort_keys = {}
+
+    def sort_vacancies(self, vacancies, param, is_reversed):
+        """Сортирует список вакансий на месте по заранее вычисленным ключам (см. get_sort_keys)
+
+           Args:
+               vacancies (list): список вакансий
+               param (str): параметр сортировки
+               is_reversed (bool): нужно ли выполнять сортировку по убыванию
+        """
+        self.sort_vacancies_by(vacancies, [(param, is_reversed)])
+
+    def sort_vacancies_by(self, vacancies, params):
+        """Сортирует список вакансий на месте по нескольким ключам.
+        Сортировки по отдельным ключам выполняются от последнего к первому;
+        благодаря устойчивости сортировки первый ключ становится главным
+
+           Args:
+               vacancies (list): список вакансий
+               params (list): пары (параметр сортировки, нужно ли сортировать по убыванию)
+        """
+        order = list(range(len(vacancies)))
+        for param, is_reversed in reversed(params):
+            keys = self.get_sort_keys(vacancies, param)
+            order.sort(key=keys.__getitem__, reverse=is_reversed)
+        vacancies[:] = [vacancies[i] for i in order]
 
     def modify_number(self, number):
         """Форматирует число: конвертирует в строку и,
@@ -300,88 +510,251 @@ class InputConnect:
     set_value = lambda self, x, val1, val2: val1 if x == 'True' else val2
 
     def formatter(self, vac):
-        """Форматирует свойства вакансии для записи в таблицу
+        """Форматирует свойства вакансии для записи в таблицу.
+        Сама вакансия не изменяется, поэтому построенные по ней индексы
+        и ключи сортировки остаются верными
 
         Args:
             vac (Vacancy): вакансия
         Returns:
-            Vacancy: вакансия с отформатированными свойствами
+            dict: название свойства -> отформатированное значение
         """
-        vac.experience_id = self.experience_naming[vac.experience_id]
-        vac.premium = self.set_value(vac.premium, "Да", "Нет")
+        values = dict(zip(vac.fields, vac.get_values()))
+        if vac.experience_id is not None:
+            values['experience_id'] = self.experience_naming[vac.experience_id]
+        if vac.premium is not None:
+            values['premium'] = self.set_value(vac.premium, "Да", "Нет")
+
+        if vac.salary is not None:
+            salary_from = self.modify_number(vac.salary.salary_from)
+            salary_to = self.modify_number(vac.salary.salary_to)
+            taxes = self.set_value(vac.salary.salary_gross, 'Без вычета налогов', 'С вычетом налогов')
+            currency = self.currency_naming[vac.salary.salary_currency]
+            values['salary'] = f"{salary_from} - {salary_to} ({currency}) ({taxes})"
+
+        if vac.published_at is not None:
+            date = vac.published_at.split('-')
+            day = str(date[2])[0:2]
+            values['published_at'] = f"{day}.{date[1]}.{date[0]}"
+        return values
+
+    salary_fields = ('salary_from', 'salary_to', 'salary_gross', 'salary_currency')
+
+    def get_columns(self, input_data):
+        """Получает столбцы csv-файла, которые нужны для вывода таблицы:
+        выводимые столбцы, а также столбцы фильтрации и сортировки
 
-        salary_from = self.modify_number(vac.salary.salary_from)
-        salary_to = self.modify_number(vac.salary.salary_to)
-        taxes = self.set_value(vac.salary.salary_gross, 'Без вычета налогов', 'С вычетом налогов')
-        currency = self.currency_naming[vac.salary.salary_currency]
+           Args:
+               input_data (dict): параметры фильтрации, сортировки и печати
+           Returns:
+               set: названия нужных столбцов; None, если выводятся все столбцы
+        """
+        if input_data['columns'][0] == '':
+            return None
+        columns = {self.eng_naming.get(column, column) for column in input_data['columns']}
+        columns.update(param for param, value in input_data['filters'])
+        if input_data['sort_param'] != '':
+            columns.add(self.eng_naming[input_data['sort_param']])
+        if 'salary' in columns or 'salary_currency' in columns:
+            columns.update(self.salary_fields)
+        return columns
+
+    def get_limit(self, numbers):
+        """Получает количество первых строк результата, достаточное для печати диапазона
+        (см. print_table)
 
-        vac.salary = f"{salary_from} - {salary_to} ({currency}) ({taxes})"
+           Args:
+               numbers (list): номера строк таблицы, которые нужно вывести
+           Returns:
+               int: количество строк; None, если нужны все строки
+        """
+        if len(numbers) == 2:
+            return int(numbers[1]) + 1
+        return None
 
-        date = vac.published_at.split('-')
-        day = str(date[2])[0:2]
-        vac.published_at = f"{day}.{date[1]}.{date[0]}"
-        return vac
+    def get_query(self, input_data):
+        """Формирует запрос к вакансиям по введенным параметрам
+
+           Args:
+               input_data (dict): параметры фильтрации, сортировки и печати
+           Returns:
+               VacancyQuery: запрос
+        """
+        sort_params = []
+        if input_data['sort_param'] != '':
+            sort_params.append((self.eng_naming[input_data['sort_param']], input_data['reversed'] == 'Да'))
+        return VacancyQuery(input_data['filters'], input_data['filter_mode'],
+                            sort_params, self.get_limit(input_data['range']))
 
     text_fields = ['name', 'description', 'employer_name', 'area_name',
                    'premium', 'experience_id']
 
-    def filter_by_salary(self, value):
-        """Фильтрует список вакансий по заданному значению оклада
+    def get_salary_index(self):
+        """Получает дерево интервалов по вилкам окладов вакансий из data_set.vacancies_objects.
+        Дерево строится при первом обращении и хранится вместе с инвертированными индексами
+
+           Returns:
+               SalaryIntervalIndex: дерево интервалов
+        """
+        self.check_indexes()
+        salary_index = self.indexes.get('salary')
+        if salary_index is None:
+            vacancies = self.data_set.vacancies_objects
+            salary_index = self.indexes['salary'] = SalaryIntervalIndex(
+                [float(vac.salary.salary_from) for vac in vacancies],
+                [float(vac.salary.salary_to) for vac in vacancies])
+        return salary_index
+
+    def find_by_salary(self, value):
+        """Находит вакансии по заданному значению оклада или по диапазону
+        окладов в формате 'от-до' с помощью дерева интервалов
+
+           Args:
+               value (str): заданный оклад или диапазон окладов
+           Returns:
+               list: номера вакансий, в которых заданное значение оклада попадает
+               в промежуток вилки оклада (или вилка пересекается с заданным диапазоном)
+        """
+        salary_index = self.get_salary_index()
+        if '-' in value:
+            low, high = value.split('-')
+            positions = salary_index.overlap(float(low), float(high))
+        else:
+            positions = salary_index.stab(float(value))
+        return positions.tolist()
+
+    index_keys = {
+        'key_skills': lambda self, vac: vac.key_skills if isinstance(vac.key_skills, list) else [],
+        'single_skill': lambda self, vac: [vac.key_skills] if isinstance(vac.key_skills, str) else [],
+        'published_at': lambda self, vac: [vac.published_at[0:10]],
+        'salary_currency': lambda self, vac: [vac.salary.salary_currency],
+    }
+
+    def check_indexes(self):
+        """Удаляет построенные индексы, если список data_set.vacancies_objects был заменен"""
+        if self.indexed_vacancies is not self.data_set.vacancies_objects:
+            self.indexed_vacancies = self.data_set.vacancies_objects
+            self.indexes = {}
+
+    def get_index(self, field):
+        """Получает инвертированный индекс по свойству вакансии: значение -> номера вакансий
+        в списке data_set.vacancies_objects (по возрастанию). Индекс строится при первом
+        обращении и перестраивается, если список вакансий был заменен
+
+           Args:
+               field (str): название свойства, 'salary_currency' - валюта оклада или
+                   'single_skill' - навык вакансии с единственным навыком
+           Returns:
+               dict: значение свойства -> список номеров вакансий
+        """
+        self.check_indexes()
+        vacancies = self.data_set.vacancies_objects
+        index = self.indexes.get(field)
+        if index is None:
+            index = self.indexes[field] = {}
+            get_keys = self.index_keys.get(field, lambda self, vac: [getattr(vac, field)])
+            for i, vacancy in enumerate(vacancies):
+                for key in get_keys(self, vacancy):
+                    index.setdefault(key, []).append(i)
+        return index
+
+    def get_vacancies_by_positions(self, positions):
+        """Получает вакансии по их номерам в списке data_set.vacancies_objects
+
+           Args:
+               positions (iterable): номера вакансий
+           Returns:
+               list: список вакансий
+        """
+        vacancies = self.data_set.vacancies_objects
+        return [vacancies[i] for i in positions]
+
+    def intersect_positions(self, groups):
+        """Пересекает списки номеров вакансий, начиная с самого короткого (самого селективного)
+
+           Args:
+               groups (list): списки номеров вакансий
+           Returns:
+               list: номера вакансий, входящие во все списки, по возрастанию
+        """
+        groups = sorted(groups, key=len)
+        positions = set(groups[0])
+        for group in groups[1:]:
+            if not positions:
+                break
+            positions.intersection_update(group)
+        return sorted(positions)
+
+    def find_by_skill(self, skill):
+        """Находит вакансии по одному навыку. Как и при проверке skill in vac.key_skills,
+        список навыков должен содержать навык целиком, а единственный навык
+        (строка) - содержать его как подстроку
 
            Args:
-               value (str): заданный оклад
+               skill (str): навык
            Returns:
-               list: список вакансий, в которых заданное значение оклада попадает
-               в промежуток вилки оклада
+               list: номера вакансий с заданным навыком
         """
-        return list(filter(lambda vac:
-                           float(vac.salary.salary_from) <= float(value) <= float(vac.salary.salary_to),
-                           self.data_set.vacancies_objects))
+        positions = list(self.get_index('key_skills').get(skill, []))
+        for single_skill, group in self.get_index('single_skill').items():
+            if skill in single_skill:
+                positions.extend(group)
+        return positions
 
-    def filter_by_skills(self, value):
-        """Фильтрует вакансии по заданным навыкам
+    def find_by_skills(self, value):
+        """Находит вакансии по заданным навыкам: пересекает списки номеров вакансий
+        из индексов навыков, начиная с самого редкого навыка
 
            Args:
                value (str): навыки
            Returns:
-               list: список вакансий, среди навыков которых присутствуют заданные навыки
+               list: номера вакансий, среди навыков которых присутствуют заданные навыки
         """
-        skills = value.split(', ')
-        return list(filter(
-            lambda vac: all(skill in vac.key_skills for skill in skills),
-            self.data_set.vacancies_objects))
+        return self.intersect_positions([self.find_by_skill(skill) for skill in value.split(', ')])
 
-    def filter_by_date(self, value):
-        """Фильтрует список вакансий по заданной дате публикации
+    def find_by_date(self, value):
+        """Находит вакансии по заданной дате публикации
 
            Args:
                value (str): дата публикации
            Returns:
-               list: список вакансий с заданной датой публикации
+               list: номера вакансий с заданной датой публикации
         """
         value = value.split('.')
         date = f"{value[2]}-{value[1]}-{value[0]}"
-        return list(filter(lambda vac: vac.published_at[0:10] == date,
-                           self.data_set.vacancies_objects))
+        return self.get_index('published_at').get(date, [])
 
-    def filter_by_currency(self, value):
-        """Фильтрует список с вакансиями по валюте оклада
+    def find_by_currency(self, value):
+        """Находит вакансии по валюте оклада
 
            Args:
                value (str): валюта оклада
            Returns:
-               list: список вакансий с заданной валютой оклада
+               list: номера вакансий с заданной валютой оклада
         """
-        return list(filter(lambda vac: vac.salary.salary_currency == value,
-                           self.data_set.vacancies_objects))
+        return self.get_index('salary_currency').get(value, [])
 
-    filter_methods = {
-        'salary': filter_by_salary,
-        'key_skills': filter_by_skills,
-        'published_at': filter_by_date,
-        'salary_currency': filter_by_currency
+    find_methods = {
+        'salary': find_by_salary,
+        'key_skills': find_by_skills,
+        'published_at': find_by_date,
+        'salary_currency': find_by_currency
     }
 
+    def get_filter_positions(self, param, value):
+        """Находит номера вакансий, удовлетворяющих условию фильтрации.
+        Текстовые свойства ищутся по инвертированному индексу (см. get_index)
+
+           Args:
+               param (str): параметр фильтрации - название свойства Vacancy
+               value (str): значение, по которому будет осуществляться фильтрация
+           Returns:
+               list: номера вакансий в списке data_set.vacancies_objects по возрастанию
+        """
+        if param in self.text_fields:
+            return self.get_index(param).get(value, [])
+        return self.find_methods[param](self, value)
+
     def filter_data(self, param, value):
         """Фильтрует список вакансий в зависимости от заданного значения
 
@@ -391,17 +764,87 @@ class InputConnect:
             Returns:
                 list: отфильтрованный список вакансий
         """
-        if param in self.text_fields:
-            return list(filter(lambda vac: vac.__dict__[param] == value,
-                               self.data_set.vacancies_objects))
-        return self.filter_methods[param](self, value)
+        return self.get_vacancies_by_positions(self.get_filter_positions(param, value))
+
+    def plan_query(self, query):
+        """Находит номера вакансий, удовлетворяющих условиям запроса. Каждое условие
+        выполняется по индексу; при объединении через И пересечение начинается
+        с самого селективного условия (самого короткого списка номеров)
+
+           Args:
+               query (VacancyQuery): запрос
+           Returns:
+               list: номера вакансий по возрастанию
+        """
+        if not query.predicates:
+            return list(range(len(self.data_set.vacancies_objects)))
+        groups = [self.get_filter_positions(param, value) for param, value in query.predicates]
+        if query.mode == 'or':
+            return sorted(set().union(*groups))
+        return self.intersect_positions(groups)
+
+    def select_top(self, vacancies, sort_params, limit):
+        """Выбирает первые limit вакансий в порядке сортировки. Если все ключи сортируются
+        в одном направлении, вместо полной сортировки используется частичная (heapq)
+
+           Args:
+               vacancies (list): список вакансий
+               sort_params (list): пары (параметр сортировки, нужно ли сортировать по убыванию)
+               limit (int): количество вакансий; None - все вакансии
+           Returns:
+               list: первые limit вакансий в порядке сортировки
+        """
+        directions = {is_reversed for param, is_reversed in sort_params}
+        if limit is None or limit >= len(vacancies) or len(directions) > 1:
+            self.sort_vacancies_by(vacancies, sort_params)
+            return vacancies[:limit]
+        columns = [self.get_sort_keys(vacancies, param) for param, is_reversed in sort_params]
+        if len(columns) == 1:
+            key = columns[0].__getitem__
+        else:
+            key = lambda i: tuple(column[i] for column in columns)
+        select = heapq.nlargest if directions.pop() else heapq.nsmallest
+        return [vacancies[i] for i in select(limit, range(len(vacancies)), key=key)]
+
+    def run_query(self, query):
+        """Выполняет запрос к вакансиям из data_set.vacancies_objects. Ограничение
+        диапазона строк передается в выбор первых вакансий (см. select_top), поэтому
+        полная сортировка не нужна; без сортировки вакансии берутся по номерам лениво
 
-    def create_table(self, data_vacancies, dic_naming):
-        """Создает таблицу с вакансиями
+           Args:
+               query (VacancyQuery): запрос
+           Returns:
+               tuple: (количество найденных вакансий, итератор по первым query.limit
+               вакансиям результата)
+        """
+        positions = self.plan_query(query)
+        if not query.sort_params:
+            vacancies = self.data_set.vacancies_objects
+            return len(positions), (vacancies[i] for i in positions[:query.limit])
+        vacancies = self.select_top(self.get_vacancies_by_positions(positions), query.sort_params, query.limit)
+        return len(positions), iter(vacancies[:query.limit])
+
+    def get_shown_fields(self, columns):
+        """Получает названия свойств вакансии, которые выводятся в таблице
 
            Args:
-               data_vacancies (list): список вакансий
+               columns (list): названия столбцов таблицы, которые нужно вывести
+           Returns:
+               set: названия свойств Vacancy; None, если выводятся все столбцы
+        """
+        if columns[0] == '':
+            return None
+        return {self.eng_naming.get(column, column) for column in columns}
+
+    def create_table(self, data_vacancies, dic_naming, first_number=1, fields=None):
+        """Создает таблицу с вакансиями. Заполняются только выводимые столбцы fields,
+        поэтому высота строк не зависит от того, были ли загружены скрытые столбцы
+
+           Args:
+               data_vacancies (iterable): вакансии
                dic_naming (dict): названия столбцов таблицы
+               first_number (int): номер первой строки таблицы
+               fields (set): названия выводимых свойств Vacancy; None - все свойства
            Returns:
                PrettyTable: таблица с вакансиями
         """
@@ -412,34 +855,50 @@ class InputConnect:
             table._max_width[title] = 20
         table.field_names = ['№'] + list(dic_naming.values())
 
-        n = 0
+        n = first_number - 1
         for vacancy in data_vacancies:
-            vacancy = self.formatter(vacancy)
+            values = self.formatter(vacancy)
             n += 1
-            for field in vacancy.__dict__.keys():
-                attr = vacancy.__dict__[field]
+            row = [n]
+            for field in vacancy.fields:
+                attr = values[field]
+                if attr is None or (fields is not None and field not in fields):
+                    attr = ''
                 if field == 'key_skills' and isinstance(attr, list) and len(attr) > 1:
-                    vacancy.__dict__[field] = '\n'.join(attr)
-                if len(vacancy.__dict__[field]) > 100:
-                    vacancy.__dict__[field] = vacancy.__dict__[field][0:100] + "..."
-            table.add_row([n] + list(vacancy.__dict__.values()))
+                    attr = '\n'.join(attr)
+                if len(attr) > 100:
+                    attr = attr[0:100] + "..."
+                row.append(attr)
+            table.add_row(row)
         return table
 
-    def print_table(self, table, numbers, columns):
-        """Выводит таблицу с вакансиями в консоль
+    def get_rows_range(self, numbers, count):
+        """Получает границы выводимого диапазона строк
 
            Args:
-               table (PrettyTable): таблица с вакансиями
                numbers (list): номера строк таблицы, которые нужно вывести
-               columns (list): названия столбцов таблицы, которые нужно вывести
+               count (int): количество строк
+           Returns:
+               tuple: (номер первой строки, номер строки после последней), начиная с 0
         """
-        names = table.field_names
         start_num = 0
-        end_num = len(table.rows)
+        end_num = count
         if numbers[0] != '':
             start_num = int(numbers[0]) - 1
         if len(numbers) == 2 and int(numbers[1]) < end_num:
             end_num = int(numbers[1]) - 1
+        return start_num, end_num
+
+    def print_table(self, table, numbers, columns):
+        """Выводит таблицу с вакансиями в консоль
+
+           Args:
+               table (PrettyTable): таблица с вакансиями
+               numbers (list): номера строк таблицы, которые нужно вывести
+               columns (list): названия столбцов таблицы, которые нужно вывести
+        """
+        names = table.field_names
+        start_num, end_num = self.get_rows_range(numbers, len(table.rows))
         if columns[0] != '':
             names = ['№'] + columns
         print(table.get_string(start=start_num, end=end_num, fields=names))
@@ -481,14 +940,27 @@ class InputConnect:
         """
         if parameter == '':
             return True
-        if ': ' not in parameter:
-            return 'Формат ввода некорректен'
+        for condition in self.split_filter_param(parameter)[1]:
+            if ': ' not in condition:
+                return 'Формат ввода некорректен'
+
+            param_title = condition.split(': ')[0]
+            if (param_title not in self.rus_naming.keys() and
+                    param_title not in self.eng_naming.keys()):
+                return 'Параметр поиска некорректен'
+
+    def split_filter_param(self, parameter):
+        """Разбивает параметр фильтрации на условия. Условия, разделенные '; ',
+        объединяются через И, разделенные ' | ' - через ИЛИ
 
-        parameter = parameter.split(': ')
-        param_title = parameter[0]
-        if (param_title not in self.rus_naming.keys() and
-                param_title not in self.eng_naming.keys()):
-            return 'Параметр поиска некорректен'
+           Args:
+               parameter (str): параметр фильтрации
+           Returns:
+               tuple: (способ объединения 'and' или 'or', список условий)
+        """
+        if ' | ' in parameter:
+            return 'or', parameter.split(' | ')
+        return 'and', parameter.split('; ')
 
     def check_if_correct(self, value, correct_values):
         """Проверяет введенный параметр на корректность
@@ -537,13 +1009,16 @@ class InputConnect:
                nums (list): номера строк, которые нужно напечатать
                columns (list): названия столбцов, которые нужно напечатать
         """
-        filter_name = ''
-        filter_value = ''
+        filters = []
+        filter_mode = 'and'
         if filter_param != '':
-            parts = filter_param.split(': ')
-            filter_name, filter_value = self.translate_paramater(parts[0], parts[1])
+            filter_mode, conditions = self.split_filter_param(filter_param)
+            for condition in conditions:
+                parts = condition.split(': ')
+                filters.append(self.translate_paramater(parts[0], parts[1]))
 
-        input_data = {'filter': [filter_name, filter_value],
+        input_data = {'filters': filters,
+                      'filter_mode': filter_mode,
                       'sort_param': sort_param,
                       'reversed': is_reversed,
                       'range': nums,
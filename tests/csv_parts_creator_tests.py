@@ -0,0 +1,76 @@
+import os
+import tempfile
+from unittest import TestCase
+import csv_reader as reader
+import csv_parts_creator as files_creator
+from columnar import ColumnarDataSet
+from currency import CurrencyRates
+
+class PartsCreatorTests(TestCase):
+    titles = ['name', 'salary_from', 'published_at']
+    rows = [['Программист', '100', '2003-01-05T10:00:00+0300'],
+            ['Аналитик', '200', '2004-02-05T10:00:00+0300'],
+            ['Дизайнер', '300', '2003-02-05T10:00:00+0300'],
+            ['Тестировщик', '400', '2004-02-06T10:00:00+0300']]
+
+    def get_folder(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        return folder.name
+
+    def test_parse_by_years_with_one_open_file(self):
+        folder = self.get_folder()
+        keys = files_creator.parse_by_years(self.rows, self.titles, max_open_files=1, folder=folder)
+        self.assertEqual(keys, ['2003', '2004'])
+        self.assertEqual(reader.read_titles(os.path.join(folder, '2003.csv')), self.titles)
+        self.assertEqual(list(reader.iter_rows(os.path.join(folder, '2003.csv'))),
+                         [self.rows[0], self.rows[2]])
+        self.assertEqual(list(reader.iter_rows(os.path.join(folder, '2004.csv'))),
+                         [self.rows[1], self.rows[3]])
+
+    def test_parse_by_months(self):
+        folder = self.get_folder()
+        keys = files_creator.parse_by_years(self.rows, self.titles, by_month=True, folder=folder)
+        self.assertEqual(keys, ['2003-01', '2003-02', '2004-02'])
+        self.assertEqual(len(list(reader.iter_rows(os.path.join(folder, '2004-02.csv')))), 2)
+
+    def test_columnar_partition_matches_csv(self):
+        folder = self.get_folder()
+        titles = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+        rows = [['Программист', '100', '300', 'RUR', 'Москва', '2003-01-05T10:00:00+0300'],
+                ['<b>Аналитик</b>', '10', '', 'USD', 'Москва', '2003-02-05T10:00:00+0300'],
+                ['Программист', '', '', '', 'Киев', '2003-02-06T10:00:00+0300'],
+                ['Программист', '1', '1', 'KZT', 'Киев', '2003-02-07T10:00:00+0300']]
+        files_creator.parse_by_years(rows, titles, folder=folder, columnar=True)
+        rates = CurrencyRates.from_currency_dict({'2003-01': {'USD': '30.0', 'KZT': ' '},
+                                                  '2003-02': {'USD': '31.0', 'KZT': ' '}})
+        from_partition = ColumnarDataSet.from_partition(os.path.join(folder, '2003'), rates)
+        from_rows = ColumnarDataSet.from_rows(rows, titles, rates)
+        self.assertEqual(from_partition.salary.tolist(), [200.0, 310.0])
+        self.assertEqual(from_partition.aggregate('Программист').years,
+                         from_rows.aggregate('Программист').years)
+        self.assertEqual(from_partition.aggregate('Программист').cities, {'Москва': [2, 510.0]})
+
+    def test_columnar_from_rows_reads_generator_once(self):
+        titles = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+        rows = [['<b>Программист</b>', '100', '300', 'RUR', 'Москва', '2003-01-05T10:00:00+0300'],
+                ['Программист', '', '400', 'RUR', '<i>Москва</i>', '2004-01-05T10:00:00+0300'],
+                ['Аналитик', '10', '', 'EUR', 'Киев', '2004-01-05T10:00:00+0300']]
+        data = ColumnarDataSet.from_rows(iter(rows), titles, CurrencyRates.from_currency_dict({}))
+        self.assertEqual(data.salary.tolist(), [200.0, 400.0])
+        self.assertEqual(data.year.tolist(), [2003, 2004])
+        self.assertEqual((data.names, data.name_codes.tolist()), (['Программист'], [0, 0]))
+        self.assertEqual((data.areas, data.area_codes.tolist()), (['Москва'], [0, 0]))
+
+    def test_stale_partition_is_not_used(self):
+        folder = self.get_folder()
+        titles = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+        row = ['Программист', '100', '100', 'RUR', 'Москва', '2003-01-05T10:00:00+0300']
+        files_creator.parse_by_years([row], titles, folder=folder, columnar=True)
+        csv_file = os.path.join(folder, '2003.csv')
+        self.assertTrue(files_creator.is_partition_current(csv_file, os.path.join(folder, '2003')))
+        with open(csv_file, 'a', encoding='utf-8') as f:
+            f.write('Аналитик,900,900,RUR,Москва,2003-01-06T10:00:00+0300\r')
+        self.assertFalse(files_creator.is_partition_current(csv_file, os.path.join(folder, '2003')))
+        files_creator.parse_by_years([row], titles, folder=folder)
+        self.assertFalse(os.path.exists(os.path.join(folder, '2003')))
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from unittest import TestCase
 import csv_reader as reader
 import statistics as stats
@@ -9,6 +11,10 @@ class CsvTests(TestCase):
         self.assertEqual(reader.clear_str(''),'')
     def test_clear_str_without_tags(self):
         self.assertEqual(reader.clear_str('text'),'text')
+    def test_clear_str_spaces_without_tags(self):
+        self.assertEqual(reader.clear_str('  a   b '),'a b')
+    def test_cleaned_indexes_skip_numbers_and_dates(self):
+        self.assertEqual(reader.get_cleaned_indexes(self.titles), [0, 3, 4])
 
     rows = [['IT аналитик', '35000.0', '45000.0', 'RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300']]
     titles = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
@@ -26,6 +32,31 @@ class CsvTests(TestCase):
     def test_csv_filter_vacancy_name(self):
         self.assertEqual((reader.csv_filer(self.rows,self.titles, self.data_set.create_vacancy))[0].name,
                          'IT аналитик')
+    def test_iter_rows_skips_incorrect_rows(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8-sig', delete=False) as f:
+            f.write('name,salary_from\nПрограммист,100\nАналитик,\n')
+        try:
+            self.assertEqual(list(reader.iter_rows(f.name)), [['Программист', '100']])
+            self.assertEqual(len(list(reader.CsvRows(f.name, only_correct=False))), 2)
+        finally:
+            os.remove(f.name)
 
-
-
+    def test_sample_sink_head(self):
+        sink = reader.SampleSink(size=2)
+        for i in range(5):
+            sink.add([i])
+        self.assertEqual(sink.rows, [[0], [1]])
+    def test_sample_sink_reservoir(self):
+        sink = reader.SampleSink(size=3, strategy='reservoir', seed=1)
+        for i in range(1000):
+            sink.add([i])
+        self.assertEqual(len(sink.rows), 3)
+        self.assertNotEqual(sink.rows, [[0], [1], [2]])
+    def test_sample_sink_saves_file(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        file_name = os.path.join(folder.name, 'sample.csv')
+        sink = reader.SampleSink(file_name=file_name)
+        sink.add(['IT аналитик', 40000.0, 'Санкт-Петербург', '2007-12-03T17:34:36+0300'])
+        sink.save()
+        self.assertEqual(list(reader.iter_rows(file_name))[0][0], 'IT аналитик')
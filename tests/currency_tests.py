@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import TestCase
+from currency import Uploader, RatesStore, CurrencyRates
+
+class BankStubHandler(BaseHTTPRequestHandler):
+    """Отдает курсы валют в формате XML_daily.asp: курс доллара равен номеру месяца"""
+    def do_GET(self):
+        month = int(self.path.split('date_req=')[1].split('/')[1])
+        body = (f'<?xml version="1.0" encoding="windows-1251"?><ValCurs Date="01.{month:02d}.2003">'
+                f'<Valute ID="R01235"><CharCode>USD</CharCode><Nominal>1</Nominal><Value>{month},5</Value></Valute>'
+                f'<Valute ID="R01335"><CharCode>KZT</CharCode><Nominal>100</Nominal><Value>20,1</Value></Valute>'
+                f'</ValCurs>').encode('windows-1251')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class UploaderTests(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.store = RatesStore(os.path.join(self.folder, 'rates.csv'))
+
+    def test_offline_without_rates_fails(self):
+        uploader = Uploader(datetime(2003, 1, 1), datetime(2003, 1, 1), ['USD'], self.store, offline=True)
+        with self.assertRaises(LookupError):
+            uploader.get_month_currency(datetime(2003, 1, 1))
+
+    def test_rates_are_taken_from_store(self):
+        self.store.add_month('2003-01', {'USD': 31.82}, ['USD', 'EUR'])
+        self.store.save()
+        uploader = Uploader(datetime(2003, 1, 1), datetime(2003, 1, 1), ['USD', 'EUR'],
+                            RatesStore(self.store.file_name), offline=True)
+        self.assertEqual(uploader.get_month_currency(datetime(2003, 1, 1)), {'USD': 31.82})
+
+    def test_concurrent_upload_keeps_months_order(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), BankStubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            uploader = Uploader(datetime(2003, 1, 1), datetime(2003, 5, 1), ['USD', 'EUR'], self.store, workers=4)
+            uploader.bank_url = f"http://127.0.0.1:{server.server_port}/scripts/XML_daily.asp"
+            uploader.collect_currencies()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(uploader.upload_dict['date'], ['2003-01', '2003-02', '2003-03', '2003-04', '2003-05'])
+        self.assertEqual(uploader.upload_dict['USD'], [1.5, 2.5, 3.5, 4.5, 5.5])
+        self.assertEqual(uploader.upload_dict['EUR'], [' '] * 5)
+
+    def test_save_creates_missing_folder(self):
+        store = RatesStore(os.path.join(self.folder, 'csv', 'rates.csv'))
+        store.add_month('2003-01', {'USD': 31.82}, ['USD'])
+        store.save()
+        self.assertEqual(RatesStore(store.file_name).rates, {('2003-01', 'USD'): 31.82})
+
+    def test_failed_save_keeps_original_error(self):
+        self.store.file_name = self.folder
+        uploader = Uploader(datetime(2003, 1, 1), datetime(2003, 1, 1), ['USD'], self.store, offline=True)
+        with self.assertRaises(LookupError):
+            uploader.collect_currencies()
+
+    def test_parse_currencies(self):
+        uploader = Uploader(datetime(2003, 1, 1), datetime(2003, 1, 1), ['USD'], self.store)
+        content = ('<?xml version="1.0" encoding="windows-1251"?><ValCurs>'
+                   '<Valute><CharCode>USD</CharCode><Value>31,7844</Value></Valute>'
+                   '<Valute><CharCode>EUR</CharCode><Value>33,1</Value></Valute></ValCurs>').encode('windows-1251')
+        self.assertEqual(uploader.parse_currencies(content), {'USD': 31.7844})
+
+class CurrencyRatesTests(TestCase):
+    rates = CurrencyRates.from_currency_dict({'2003-01': {'USD': '30.5', 'KZT': ' '},
+                                              '2003-03': {'USD': '31.0', 'KZT': '0.2'}})
+
+    def test_get_rate(self):
+        self.assertEqual(self.rates.get_rate('2003-03', 'USD'), 31.0)
+    def test_get_missing_rate(self):
+        self.assertEqual([self.rates.get_rate('2003-01', 'KZT'), self.rates.get_rate('2003-02', 'USD'),
+                          self.rates.get_rate('2004-01', 'USD'), self.rates.get_rate('2003-01', 'EUR')],
+                         [None, None, None, None])
+    def test_convert_columns(self):
+        result = self.rates.convert(['10', '', '', '1'], ['20', '40', '', '3'],
+                                    ['USD', 'RUR', 'RUR', 'KZT'], ['2003-01-05', '2003-01', '2003-01', '2003-01'])
+        self.assertEqual(result[0:2].tolist(), [457.5, 40.0])
+        self.assertTrue(all(value != value for value in result[2:]))
@@ -0,0 +1,25 @@
+from unittest import TestCase
+from datetime import datetime as module_dt
+import date_converter as dt_converter
+
+class DateConverterTests(TestCase):
+    def test_convert_hh_date(self):
+        self.assertEqual(dt_converter.convert_to_date('2022-05-31T17:32:31+0300'),
+                         module_dt(2022, 5, 31, 20, 32, 31))
+    def test_convert_negative_offset(self):
+        self.assertEqual(dt_converter.convert_to_date('2022-05-31T17:32:31-0130'),
+                         module_dt(2022, 5, 31, 16, 2, 31))
+    def test_convert_not_hh_format(self):
+        self.assertEqual(dt_converter.convert_to_date('2022-05-31 17:32:31+03:00'),
+                         module_dt(2022, 5, 31, 20, 32, 31))
+    def test_convert_column(self):
+        dates = ['2022-05-31T17:32:31+0300', '2003-01-01T00:00:00-0100', '2022-05-31 17:32:31']
+        self.assertEqual([date.item() for date in dt_converter.convert_to_dates(dates)],
+                         [dt_converter.convert_to_date(date) for date in dates])
+    def test_date_cache_counters(self):
+        dt_converter.configure_date_cache(2)
+        for date in ['2022-05-31T17:32:31+0300', '2022-05-31T17:32:31+0300', '2003-01-01T00:00:00+0400']:
+            dt_converter.convert_to_date(date)
+        info = dt_converter.get_date_cache_info()
+        dt_converter.configure_date_cache()
+        self.assertEqual((info.hits, info.misses, info.maxsize, info.currsize), (1, 2, 2, 2))
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from unittest import TestCase
+from hh_downloader import HhDownloader, RateLimiter
+
+DAY = datetime(2022, 12, 15)
+VACANCIES = [DAY + timedelta(minutes=minute) for minute in range(24 * 60)
+             if minute >= 6 * 60 or minute % 10 == 0]
+
+class FakeHhHandler(BaseHTTPRequestHandler):
+    """Отдает вакансии из VACANCIES, опубликованные в промежутке [date_from, date_to);
+    до 06:00 вакансии публикуются раз в 10 минут, после - каждую минуту.
+    Запрос страницы из failing_pages завершается ошибкой 500"""
+    requests = []
+    failing_pages = set()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start = datetime.fromisoformat(query['date_from'][0])
+        end = datetime.fromisoformat(query['date_to'][0])
+        page = int(query['page'][0])
+        per_page = int(query['per_page'][0])
+        self.requests.append((query['date_from'][0], page))
+        if (query['date_from'][0], page) in self.failing_pages:
+            self.send_response(500)
+            self.end_headers()
+            return
+        found = [date for date in VACANCIES if start <= date < end]
+        items = [{'name': date.isoformat(), 'salary': None, 'area': {'name': 'Москва'},
+                  'published_at': f"{date.isoformat()}+0300"}
+                 for date in found[page * per_page:(page + 1) * per_page]]
+        body = json.dumps({'items': items, 'found': len(found),
+                           'pages': -(-len(found) // per_page)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class HhDownloaderTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeHhHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.file_name = os.path.join(folder.name, 'vacancies.csv')
+        self.checkpoint_name = os.path.join(folder.name, 'checkpoint.json')
+        FakeHhHandler.requests = []
+        FakeHhHandler.failing_pages = set()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def create_downloader(self, workers=1):
+        downloader = HhDownloader(self.file_name, self.checkpoint_name, workers)
+        downloader.api_url = f"http://127.0.0.1:{self.server.server_port}/vacancies"
+        downloader.per_page = 2
+        downloader.retries = 0
+        downloader.requests_per_second = 10000
+        return downloader
+
+    def read_names(self):
+        with open(self.file_name, 'r', encoding='utf-8', newline='') as f:
+            return [row.split(',')[0] for row in f.read().split('\r') if row != ''][1:]
+
+    def test_plan_splits_busy_and_merges_quiet_windows(self):
+        downloader = self.create_downloader()
+        windows = downloader.merge_windows(downloader.plan_windows(DAY, DAY + timedelta(days=1)))
+        self.assertTrue(all(found <= 40 for start, end, found in windows))
+        self.assertEqual(sum(found for start, end, found in windows), len(VACANCIES))
+        self.assertEqual([start for start, end, found in windows[1:]], [end for start, end, found in windows[:-1]])
+        self.assertEqual(windows[0][0:2], (DAY, DAY + timedelta(hours=6)))
+
+    def fail_download(self):
+        downloader = self.create_downloader()
+        downloader.job = downloader.get_job(DAY, DAY + timedelta(days=1))
+        windows = downloader.load_plan(DAY, DAY + timedelta(days=1))
+        failing_page = (windows[5][0].isoformat(), 1)
+        FakeHhHandler.failing_pages = {failing_page}
+        with self.assertRaises(Exception):
+            downloader.get_data_from_hh_ru(DAY, DAY + timedelta(days=1))
+        FakeHhHandler.failing_pages = set()
+        FakeHhHandler.requests = []
+        return failing_page
+
+    def test_resume_after_failure(self):
+        failing_page = self.fail_download()
+        self.create_downloader().get_data_from_hh_ru(DAY, DAY + timedelta(days=1))
+
+        self.assertEqual(FakeHhHandler.requests[0], failing_page)
+        self.assertEqual(self.read_names(), [date.isoformat() for date in VACANCIES])
+        self.assertFalse(os.path.exists(self.checkpoint_name))
+
+    def test_checkpoint_of_other_period_is_not_resumed(self):
+        self.fail_download()
+        self.create_downloader().get_data_from_hh_ru(DAY, DAY + timedelta(hours=12))
+        self.assertEqual(self.read_names(), [date.isoformat() for date in VACANCIES
+                                             if date < DAY + timedelta(hours=12)])
+
+    def test_default_checkpoint_named_after_output(self):
+        self.assertEqual(HhDownloader('data/out.csv').checkpoint_name, 'data/out.checkpoint.json')
+
+    def test_concurrent_download_keeps_order(self):
+        self.create_downloader(workers=4).get_data_from_hh_ru(DAY, DAY + timedelta(days=1))
+        self.assertEqual(self.read_names(), [date.isoformat() for date in VACANCIES])
+
+    def test_rate_limiter_spaces_requests(self):
+        limiter = RateLimiter(50)
+        start = time.monotonic()
+        for i in range(6):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
@@ -1,5 +1,6 @@
 from unittest import TestCase
-from statistics import Vacancy, DataSet
+from statistics import Vacancy, DataSet, StatisticsAccumulator, ApproximateStatistics
+from columnar import ColumnarDataSet
 
 class Statistics_Test(TestCase):
     dataset= DataSet("vacancies_diff_currencies.csv", "Программист")
@@ -19,5 +20,50 @@ class Statistics_Test(TestCase):
         self.assertEqual(self.connector.count_vacancies_by_cities([]), {})
     def test_get_salary_by_age(self):
         self.assertEqual(self.connector.get_salary_by_age(self.vacancies),1066)
+    def test_accumulator_years_statistics(self):
+        accumulator = StatisticsAccumulator('Программист').add_all(self.vacancies)
+        self.assertEqual(accumulator.get_years_statistics(),
+                         {'salary_all': {'2021': 1000, '2022': 1100},
+                          'number_all': {'2021': 1, '2022': 2},
+                          'salary_job': {'2021': 0, '2022': 1000},
+                          'number_job': {'2021': 0, '2022': 1}})
+    def test_accumulator_cities_statistics(self):
+        accumulator = StatisticsAccumulator('Программист').add_all(self.vacancies)
+        self.assertEqual(accumulator.get_cities_statistics(),
+                         ({'Екатеринбург': 1000, 'Томск': 1200},
+                          {'Екатеринбург': 0.6667, 'Томск': 0.3333}))
+    def test_columnar_aggregate_matches_accumulator(self):
+        vacancies = [Vacancy(vac.name, vac.salary, vac.area_name, int(vac.published_at))
+                     for vac in self.vacancies]
+        expected = StatisticsAccumulator('Программист').add_all(vacancies)
+        result = ColumnarDataSet.from_vacancies(vacancies).aggregate('Программист')
+        self.assertEqual(result.get_years_statistics(), expected.get_years_statistics())
+        self.assertEqual(result.get_cities_statistics(), expected.get_cities_statistics())
+    def test_columnar_backend_uses_parsed_columns(self):
+        data_set = DataSet('years_data', 'Программист')
+        data_set.columnar = ColumnarDataSet.from_values([100.0, 300.0], [2007, 2007],
+                                                        ['Москва', 'Москва'], ['Программист', 'Аналитик'])
+        years, cities = data_set.connector.get_statistics('columnar')
+        self.assertEqual(years['salary_all'], {2007: 200})
+        self.assertEqual(years['number_job'], {2007: 1})
+    def test_accumulator_merge(self):
+        first = StatisticsAccumulator('Программист').add_all(self.vacancies[0:1])
+        second = StatisticsAccumulator('Программист').add_all(self.vacancies[1:])
+        expected = StatisticsAccumulator('Программист').add_all(self.vacancies)
+        first.merge(second)
+        self.assertEqual(first.years, expected.years)
+        self.assertEqual(first.cities, expected.cities)
 
-
+    def test_approximate_statistics_with_full_sample_is_exact(self):
+        titles = ['name', 'salary', 'area_name', 'published_at']
+        rows = [['Программист', '100', 'Москва', '2007'], ['Аналитик', '300', 'Москва', '2007'],
+                ['Программист', '500', 'Екб', '2008']]
+        create_vacancy = lambda vac_dict, rates: Vacancy(vac_dict['name'], vac_dict['salary'],
+                                                         vac_dict['area_name'], int(vac_dict['published_at']))
+        approximate = ApproximateStatistics('Программист', sample_size=10, seed=1).add_rows(rows, titles)
+        accumulator = approximate.estimate(titles, create_vacancy, None)
+        exact = StatisticsAccumulator('Программист').add_all(create_vacancy(dict(zip(titles, row)), None)
+                                                               for row in rows)
+        self.assertEqual(accumulator.get_years_statistics(), exact.get_years_statistics())
+        self.assertEqual(approximate.intervals['salary_all'], {2007: 0.0, 2008: 0.0})
+        self.assertTrue(all(row[-1] for row in approximate.get_error_report(exact)))
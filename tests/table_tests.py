@@ -1,6 +1,11 @@
 from unittest import TestCase
+import os
+import tempfile
+import io
+from contextlib import redirect_stdout
 from datetime import datetime as module_dt
-from table import Vacancy, Salary, DataSet, InputConnect
+from currency import Currency, CurrencyRates
+from table import Vacancy, Salary, DataSet, InputConnect, VacancyQuery, SalaryIntervalIndex
 
 class TableVacanciesTest(TestCase):
     salary = Salary(100,200,'True','RUR')
@@ -26,12 +31,162 @@ class TableVacanciesTest(TestCase):
     def test_modify_number(self):
         self.assertEqual(self.connector.modify_number('10000'),'10 000')
     def test_formatter_salary(self):
-        self.connector.formatter(self.vacancy_analyst)
-        self.assertEqual(self.vacancy_analyst.salary,'100 - 200 (Рубли) (Без вычета налогов)')
+        values = self.connector.formatter(self.vacancy_analyst)
+        self.assertEqual(values['salary'],'100 - 200 (Рубли) (Без вычета налогов)')
+        self.assertIs(self.vacancy_analyst.salary, self.salary)
     def test_check_input_values_empty(self):
         self.assertEqual(self.connector.check_input_values('','',''),'')
+    def test_vacancy_values_in_fields_order(self):
+        vacancy = Vacancy('Тестировщик', 'Описание', 'Внимательность', 'noExperience',
+                          'False', 'Скб Контур', self.salary, 'Екб', '2022-05-31T17:32:31+0300')
+        self.assertEqual(dict(zip(Vacancy.fields, vacancy.get_values()))['area_name'], 'Екб')
+        self.assertFalse(hasattr(vacancy, '__dict__'))
+    def test_get_columns_adds_filter_and_sort_fields(self):
+        input_data = {'filters': [('salary_currency', 'USD')], 'sort_param': 'Навыки',
+                      'reversed': '', 'range': [''], 'columns': ['Название']}
+        self.assertEqual(self.connector.get_columns(input_data),
+                         {'name', 'key_skills', 'salary_currency', 'salary_from', 'salary_to', 'salary_gross'})
+    def test_projected_vacancy_skips_missing_fields(self):
+        values = self.connector.formatter(self.dataset.create_vacancy({'name': 'Программист'}))
+        self.assertEqual(values['name'], 'Программист')
+        self.assertIsNone(values['description'])
+    def test_sort_vacancies_by_two_keys(self):
+        vacancies = [Vacancy(name, '', 'Навык', experience, 'False', 'Контур', Salary(*salary, 'True', 'RUR'),
+                             'Екб', '2022-05-31T17:32:31+0300')
+                     for name, experience, salary in [('a', 'noExperience', (10, 20)),
+                                                      ('b', 'moreThan6', (10, 20)),
+                                                      ('c', 'moreThan6', (50, 60))]]
+        self.connector.sort_vacancies_by(vacancies, [('experience_id', True), ('salary', False)])
+        self.assertEqual([vac.name for vac in vacancies], ['b', 'c', 'a'])
+        self.assertEqual(len(self.connector.sort_keys['salary']), 3)
+    def test_filter_by_skills_with_index(self):
+        dataset = DataSet('vacancies_table.csv')
+        dataset.vacancies_objects = [self.vacancy_programmer,
+                                     Vacancy('Тестировщик', '', ['Усидчивость', 'SQL'], 'noExperience', 'False',
+                                             'Контур', self.salary, 'Екб', '2022-05-30T17:32:31+0300')]
+        self.assertEqual([vac.name for vac in dataset.connector.filter_data('key_skills', 'SQL, Усидчивость')],
+                         ['Тестировщик'])
+        self.assertEqual(len(dataset.connector.filter_data('key_skills', 'Усидчивость')), 2)
+        self.assertEqual(len(dataset.connector.filter_data('published_at', '30.05.2022')), 1)
+        self.assertEqual(len(dataset.connector.filter_data('employer_name', 'Скб Контур')), 1)
+    def test_filter_by_salary_value_and_range(self):
+        dataset = DataSet('vacancies_table.csv')
+        dataset.vacancies_objects = [Vacancy(str(i), '', 'Навык', 'noExperience', 'False', 'Контур',
+                                             Salary(salary_from, salary_to, 'True', 'RUR'), 'Екб',
+                                             '2022-05-30T17:32:31+0300')
+                                     for i, (salary_from, salary_to) in enumerate([(100, 200), (150, 300), (400, 500)])]
+        self.assertEqual([vac.name for vac in dataset.connector.filter_data('salary', '150')], ['0', '1'])
+        self.assertEqual([vac.name for vac in dataset.connector.filter_data('salary', '250-450')], ['1', '2'])
+    def test_query_with_predicates_and_top_k(self):
+        dataset = DataSet('vacancies_table.csv')
+        dataset.vacancies_objects = [Vacancy(str(i), '', 'Навык', 'noExperience', 'False', employer,
+                                             Salary(salary, salary + 100, 'True', currency), 'Екб',
+                                             '2022-05-30T17:32:31+0300')
+                                     for i, (employer, salary, currency) in enumerate(
+                                         [('Контур', 300, 'RUR'), ('Контур', 100, 'USD'),
+                                          ('Яндекс', 200, 'RUR'), ('Контур', 200, 'RUR')])]
+        connector = dataset.connector
+        query = VacancyQuery([('employer_name', 'Контур'), ('salary_currency', 'RUR')], 'and',
+                             [('salary', False)], limit=1)
+        count, vacancies = connector.run_query(query)
+        self.assertEqual(count, 2)
+        self.assertEqual([vac.name for vac in vacancies], ['3'])
+        count, vacancies = connector.run_query(VacancyQuery([('employer_name', 'Контур')], limit=2))
+        self.assertEqual((count, [vac.name for vac in vacancies]), (3, ['0', '1']))
+        query = VacancyQuery([('employer_name', 'Яндекс'), ('salary_currency', 'USD')], 'or',
+                             [('salary', True)])
+        self.assertEqual([vac.name for vac in connector.run_query(query)[1]], ['1', '2'])
+    def test_create_table_formats_only_given_rows(self):
+        vacancies = [Vacancy(str(i), '', 'Навык', 'noExperience', 'False', 'Контур',
+                             Salary(100, 200, 'True', 'RUR'), 'Екб', '2022-05-30T17:32:31+0300')
+                     for i in range(5)]
+        table = self.connector.create_table(vacancies[2:4], self.connector.rus_naming, 3)
+        self.assertEqual([row[0] for row in table.rows], [3, 4])
+        self.assertEqual(vacancies[0].experience_id, 'noExperience')
+        self.assertEqual(self.connector.get_rows_range(['2', '4'], 10), (1, 3))
+    def test_queries_after_create_table_use_unformatted_vacancies(self):
+        dataset = DataSet('vacancies_table.csv')
+        dataset.vacancies_objects = [Vacancy(str(i), '', 'Навык', 'noExperience', 'False', 'Контур',
+                                             Salary(salary, salary + 100, 'True', 'RUR'), 'Екб',
+                                             '2022-05-30T17:32:31+0300')
+                                     for i, salary in enumerate([100000, 50000, 99950])]
+        connector = dataset.connector
+        query = VacancyQuery([('employer_name', 'Контур')], sort_params=[('salary', True)], limit=2)
+        connector.create_table(connector.run_query(query)[1], connector.rus_naming)
+        self.assertEqual([vac.name for vac in connector.run_query(query)[1]], ['0', '2'])
+        self.assertEqual(dataset.vacancies_objects[0].experience_id, 'noExperience')
+        query = VacancyQuery([('salary', '100000')])
+        self.assertEqual([vac.name for vac in connector.run_query(query)[1]], ['0', '2'])
+    def test_repeated_queries_reuse_loaded_vacancies(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        file_name = os.path.join(folder.name, 'vacancies.csv')
+        with open(file_name, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write('name,description,key_skills,experience_id,premium,employer_name,salary_from,'
+                    'salary_to,salary_gross,salary_currency,area_name,published_at\n'
+                    'Программист,Описание,Python,noExperience,False,Контур,100,200,True,RUR,Екб,'
+                    '2022-05-30T17:32:31+0300\n')
+        dataset = DataSet(file_name)
+        rates = Currency.rates
+        Currency.rates = CurrencyRates.from_currency_dict({})
+        self.addCleanup(setattr, Currency, 'rates', rates)
+        dataset.load_vacancies({'name', 'employer_name'})
+        vacancies = dataset.vacancies_objects
+        dataset.connector.filter_data('employer_name', 'Контур')
+        dataset.load_vacancies({'name'})
+        self.assertIs(dataset.vacancies_objects, vacancies)
+        self.assertIn('employer_name', dataset.connector.indexes)
+        dataset.load_vacancies({'name', 'area_name'})
+        self.assertIsNot(dataset.vacancies_objects, vacancies)
+    def test_salary_index_skips_inverted_forks(self):
+        index = SalaryIntervalIndex([200.0, 10.0, 50.0], [100.0, 20.0, 300.0])
+        self.assertEqual(index.stab(15).tolist(), [1])
+        self.assertEqual(index.stab(150).tolist(), [2])
+        self.assertEqual(index.overlap(90, 250).tolist(), [2])
+        self.assertEqual(SalaryIntervalIndex([200.0], [100.0]).stab(150).tolist(), [])
+    def test_projected_query_output_does_not_depend_on_previous_load(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        file_name = os.path.join(folder.name, 'vacancies.csv')
+        with open(file_name, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write('name,description,key_skills,experience_id,premium,employer_name,salary_from,'
+                    'salary_to,salary_gross,salary_currency,area_name,published_at\n'
+                    'Программист,' + 'Очень длинное описание ' * 5 + ',"Python\nSQL\nGit",noExperience,'
+                    'False,Контур,100,200,True,RUR,Екб,2022-05-30T17:32:31+0300\n')
+        rates = Currency.rates
+        Currency.rates = CurrencyRates.from_currency_dict({})
+        self.addCleanup(setattr, Currency, 'rates', rates)
 
+        def print_query(dataset, columns):
+            output = io.StringIO()
+            with redirect_stdout(output):
+                dataset.connector.print_result(dataset, '', '', '', [''], columns)
+            return output.getvalue()
 
-
-
-
+        fresh = print_query(DataSet(file_name), ['Название', 'Оклад'])
+        dataset = DataSet(file_name)
+        print_query(dataset, [''])
+        self.assertEqual(print_query(dataset, ['Название', 'Оклад']), fresh)
+        self.assertEqual(len(fresh.splitlines()), 5)
+    def test_hidden_columns_do_not_change_row_height(self):
+        vacancy = Vacancy('Программист', 'Очень длинное описание ' * 5, ['Python', 'SQL', 'Git'], 'noExperience',
+                          'False', 'Контур', self.salary, 'Екб', '2022-05-30T17:32:31+0300')
+        projected = self.dataset.create_vacancy({'name': 'Программист'})
+        tables = [self.connector.create_table([vac], self.connector.rus_naming, fields={'name'})
+                  for vac in (vacancy, projected)]
+        outputs = [table.get_string(fields=['№', 'Название']) for table in tables]
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(len(outputs[0].splitlines()), 5)
+    def test_filter_by_single_skill_matches_substring(self):
+        dataset = DataSet('vacancies_table.csv')
+        dataset.vacancies_objects = [Vacancy(str(i), '', skills, 'noExperience', 'False', 'Контур', self.salary,
+                                             'Екб', '2022-05-30T17:32:31+0300')
+                                     for i, skills in enumerate(['Python Django', ['Python Django', 'SQL'],
+                                                                 ['Python', 'SQL'], 'Java'])]
+        self.assertEqual([vac.name for vac in dataset.connector.filter_data('key_skills', 'Python')], ['0', '2'])
+        self.assertEqual([vac.name for vac in dataset.connector.filter_data('key_skills', 'Python, SQL')], ['2'])
+        self.assertEqual([vac.name for vac in dataset.connector.filter_data('key_skills', 'Django')], ['0'])
+    def test_salary_overlap_with_inverted_range_is_empty(self):
+        index = SalaryIntervalIndex([100.0, 150.0], [200.0, 300.0])
+        self.assertEqual(index.overlap(250, 120).tolist(), [])
+        self.assertEqual(index.overlap(120, 250).tolist(), [0, 1])